@@ -1,6 +1,7 @@
-from flask import Blueprint, send_from_directory, abort, current_app, jsonify
+from flask import Blueprint, send_from_directory, abort, current_app, jsonify, request, make_response
 from flask_jwt_extended import jwt_required, get_jwt_identity
 import os
+import json
 
 download_bp = Blueprint('download', __name__)
 
@@ -24,4 +25,95 @@ def download_scanner_exe():
         )
     except Exception as e:
         current_app.logger.error(f"Download error: {str(e)}")
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
+
+# Signature feed layout under SIGNATURE_FEED_DIR:
+#   manifest.json         {"version": latest, "base_version": oldest version a delta can start from}
+#   signatures.json       full set at the latest version {"version", "signatures", "patterns"}
+#   deltas/<version>.json changes made by that version {"version", "added", "removed",
+#                         "patterns_added", "patterns_removed"}
+SIGNATURE_FEED_DIR = 'signature_feed'
+
+
+def _load_feed_json(*parts):
+    with open(os.path.join(current_app.root_path, SIGNATURE_FEED_DIR, *parts), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _signature_key(record):
+    # A signature is identified by its first digest, e.g. "md5:<hex>"
+    for algorithm in ("md5", "sha1", "sha256"):
+        if record.get(algorithm):
+            return f"{algorithm}:{record[algorithm].lower()}"
+    return None
+
+
+def _merge_deltas(since, version):
+    """Fold the deltas after since up to version into one, so each key appears once"""
+    signatures = {}
+    patterns = {}
+    for delta_version in range(since + 1, version + 1):
+        delta = _load_feed_json('deltas', f'{delta_version}.json')
+        for record in delta.get("added", []):
+            signatures[_signature_key(record)] = record
+        for record in delta.get("removed", []):
+            signatures[_signature_key(record)] = None
+        for record in delta.get("patterns_added", []):
+            patterns[record["id"]] = record
+        for pattern_id in delta.get("patterns_removed", []):
+            patterns[pattern_id] = None
+    return {
+        "type": "delta",
+        "from_version": since,
+        "version": version,
+        "added": [record for record in signatures.values() if record is not None],
+        "removed": [key for key, record in signatures.items() if record is None],
+        "patterns_added": [record for record in patterns.values() if record is not None],
+        "patterns_removed": [pattern_id for pattern_id, record in patterns.items() if record is None]
+    }
+
+
+@download_bp.route('/signatures', methods=["GET"])
+@jwt_required()
+def download_signature_delta():
+    """Signature changes since ?since=<version>.
+
+    The ETag names the feed version, so a scanner that is up to date sends
+    If-None-Match: "signatures-<its version>" and gets an empty 304 back.
+    Scanners too far behind the oldest kept delta get the full set instead.
+    """
+    try:
+        since = request.args.get('since', 0, type=int)
+        manifest = _load_feed_json('manifest.json')
+        version = int(manifest["version"])
+        etag = f'"signatures-{version}"'
+
+        if etag in request.headers.get('If-None-Match', '') or since == version:
+            response = make_response('', 304)
+        else:
+            payload = None
+            if 0 < since < version and since >= int(manifest.get("base_version", 0)):
+                try:
+                    payload = _merge_deltas(since, version)
+                except FileNotFoundError:
+                    # A pruned delta - fall back to the full set
+                    payload = None
+            if payload is None:
+                full = _load_feed_json('signatures.json')
+                payload = {
+                    "type": "full",
+                    "version": version,
+                    "signatures": full.get("signatures", []),
+                    "patterns": full.get("patterns", [])
+                }
+            response = jsonify(payload)
+
+        response.headers['ETag'] = etag
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    except FileNotFoundError as e:
+        current_app.logger.error(f"Signature feed file missing: {str(e)}")
+        return jsonify({"error": "Signature feed not available"}), 404
+    except Exception as e:
+        current_app.logger.error(f"Signature delta error: {str(e)}")
+        return jsonify({"error": str(e)}), 500
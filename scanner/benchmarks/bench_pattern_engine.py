@@ -0,0 +1,66 @@
+"""Measure compile time and scan throughput of the byte-pattern engine.
+
+Usage: python benchmarks/bench_pattern_engine.py [--patterns 10000 50000] [--size-mb 16] [--repeat 3]
+
+Builds a PatternMatcher from random patterns (8-32 bytes, like short code
+signatures), then streams random data through it in HASH_CHUNK_SIZE chunks,
+the same way hash_file feeds it during a scan. The first pass over the data
+also builds the lazy DFA rows, so it is reported separately from the best
+warm pass.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pattern_engine import PatternMatcher  # noqa: E402
+from scanner import HASH_CHUNK_SIZE  # noqa: E402
+
+
+def make_patterns(count, rng):
+    return [{"id": f"BENCH-{i}", "hex": rng.randbytes(rng.randint(8, 32)).hex()} for i in range(count)]
+
+
+def time_scan(matcher, data):
+    view = memoryview(data)
+    start = time.perf_counter()
+    stream = matcher.stream()
+    for offset in range(0, len(data), HASH_CHUNK_SIZE):
+        stream.feed(view[offset:offset + HASH_CHUNK_SIZE])
+    return time.perf_counter() - start, stream.results()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--patterns", nargs="*", type=int, default=[1000, 10000, 50000])
+    parser.add_argument("--size-mb", type=int, default=16)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    data = bytearray(rng.randbytes(args.size_mb * 1024 * 1024))
+
+    print(f"{'patterns':>9} {'compile s':>10} {'first MB/s':>11} {'warm MB/s':>10} {'matches':>8}")
+    for count in args.patterns:
+        patterns = make_patterns(count, rng)
+        # Plant a few patterns, one straddling a chunk boundary, so matches are exercised
+        for i, offset in enumerate((100, HASH_CHUNK_SIZE - 4, len(data) // 2)):
+            planted = bytes.fromhex(patterns[i]["hex"])
+            data[offset:offset + len(planted)] = planted
+
+        start = time.perf_counter()
+        matcher = PatternMatcher(patterns)
+        compile_time = time.perf_counter() - start
+
+        first, results = time_scan(matcher, data)
+        warm = min(time_scan(matcher, data)[0] for _ in range(args.repeat))
+        print(f"{count:>9} {compile_time:>10.2f} {args.size_mb / first:>11.1f} "
+              f"{args.size_mb / warm:>10.1f} {len(results):>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Time a localhost connect scan of scanner.scan_open_ports.
+
+Usage: python benchmarks/bench_port_scan.py [--listeners 20] [--concurrency 100 500 1000] [--last-port 65535]
+
+Opens a number of listening sockets on 127.0.0.1, sweeps ports 1..last-port
+at each concurrency level and checks that every listener was reported open.
+Keep the concurrency below the process's open file limit (ulimit -n).
+"""
+import argparse
+import os
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scanner import scan_open_ports  # noqa: E402
+
+
+def open_listeners(count):
+    listeners = []
+    for _ in range(count):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.bind(("127.0.0.1", 0))
+        sock.listen(16)
+        listeners.append(sock)
+    return listeners
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--listeners", type=int, default=20)
+    parser.add_argument("--concurrency", nargs="*", type=int, default=[100, 500, 1000])
+    parser.add_argument("--last-port", type=int, default=65535)
+    args = parser.parse_args()
+
+    listeners = open_listeners(args.listeners)
+    expected = {sock.getsockname()[1] for sock in listeners if sock.getsockname()[1] <= args.last_port}
+    try:
+        results = []
+        for concurrency in args.concurrency:
+            start = time.perf_counter()
+            found = scan_open_ports(ports=range(1, args.last_port + 1), concurrency=concurrency)
+            elapsed = time.perf_counter() - start
+            missing = expected - {entry["port"] for entry in found}
+            assert not missing, f"listeners not reported open: {sorted(missing)}"
+            results.append((concurrency, elapsed, len(found)))
+
+        print(f"\n{'concurrency':>11} {'seconds':>8} {'ports/s':>9} {'open':>5}")
+        for concurrency, elapsed, open_count in results:
+            print(f"{concurrency:>11} {elapsed:>8.2f} {args.last_port / elapsed:>9.0f} {open_count:>5}")
+    finally:
+        for sock in listeners:
+            sock.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Measure how long the external signature file takes to load and to check for updates.
+
+Usage: python benchmarks/bench_signature_loader.py [counts ...] [--lookups 100000]
+
+For each signature count, writes a signature file with the hashes inline in the
+JSON and a second one that points at a binary database (signature_db.py). For each
+file it times the first load in a fresh SignatureStore, a digest lookup, and the
+per-file cost of SignatureStore.current(), which scans call for every file so they
+pick up a newer version.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scanner import SignatureStore  # noqa: E402
+from signature_db import build_signature_db  # noqa: E402
+
+
+def make_records(count):
+    return [{"md5": os.urandom(16).hex(), "name": f"Bench.Sample{i % 1000}", "size": 1024 + i % 4096}
+            for i in range(count)]
+
+
+def time_store(path, probe, lookups):
+    start = time.perf_counter()
+    store = SignatureStore(path)
+    index = store.index()
+    load = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(lookups):
+        index.match({"md5": probe})
+    lookup = (time.perf_counter() - start) / lookups
+
+    start = time.perf_counter()
+    for _ in range(lookups):
+        store.current()
+    current = (time.perf_counter() - start) / lookups
+    assert index.match({"md5": probe})[1], "probe digest not found"
+    return load, lookup, current
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("counts", nargs="*", type=int, default=[10000, 100000, 1000000])
+    parser.add_argument("--lookups", type=int, default=100000)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        print(f"{'signatures':>10} {'format':>7} {'load s':>8} {'lookup us':>10} {'current() us':>13}")
+        for count in args.counts:
+            records = make_records(count)
+            probe = records[count // 2]["md5"]
+
+            json_path = os.path.join(work_dir, f"inline-{count}.json")
+            with open(json_path, "w", encoding="utf-8") as f:
+                json.dump({"version": 1, "signatures": records}, f)
+
+            db_name = f"feed-{count}.sdb"
+            build_signature_db(records, os.path.join(work_dir, db_name), version=1)
+            db_json_path = os.path.join(work_dir, f"db-{count}.json")
+            with open(db_json_path, "w", encoding="utf-8") as f:
+                json.dump({"version": 1, "database": db_name}, f)
+
+            for label, path in (("json", json_path), ("sdb", db_json_path)):
+                load, lookup, current = time_store(path, probe, args.lookups)
+                print(f"{count:>10} {label:>7} {load:>8.3f} {lookup * 1e6:>10.2f} {current * 1e6:>13.3f}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
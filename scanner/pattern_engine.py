@@ -0,0 +1,181 @@
+import hashlib
+from operator import length_hint
+
+# Upper bound on DFA rows built per generation (each row holds 257 references);
+# past it new streams start on a fresh generation and the old one is freed with its streams
+MAX_DFA_ROWS = 50000
+
+# Slot of a built DFA row holding the pattern indexes that end in its state
+_OUTPUTS = 256
+
+
+# Function: Convert a pattern record into the bytes to search for
+def pattern_bytes(record):
+    if record.get("hex"):
+        return bytes.fromhex(record["hex"].replace(" ", ""))
+    if record.get("text") is not None:
+        return record["text"].encode("latin-1")
+    return bytes(record["bytes"])
+
+
+class _LazyDFA:
+    """DFA rows for the automaton, built the first time the input reaches each state.
+
+    Every state owns one list object for its whole life. An unbuilt row is just [state];
+    building fills it in place, so rows can point straight at the row objects of their
+    next states and the scan loop needs a single list index per byte.
+    """
+
+    def __init__(self, goto, fail, outputs):
+        self.goto = goto
+        self.fail = fail
+        self.outputs = outputs
+        self.rows = [[state] for state in range(len(goto))]
+        self.built = 0
+
+    def build(self, row):
+        if len(row) > 1:
+            return row
+        state = row[0]
+        if state == 0:
+            new_row = [row] * 256
+        else:
+            # A state behaves like its failure state except on its own trie edges
+            new_row = self.build(self.rows[self.fail[state]])[:256]
+        rows = self.rows
+        for byte, next_state in self.goto[state].items():
+            new_row[byte] = rows[next_state]
+        new_row.append(self.outputs[state])
+        # Slice assignment is atomic, so hash worker threads can share the DFA
+        row[:] = new_row
+        self.built += 1
+        return row
+
+
+class PatternMatcher:
+    """Aho-Corasick automaton over many byte patterns, compiled once and shared by all scans"""
+
+    def __init__(self, patterns):
+        self.patterns = []
+        goto = [{}]
+        outputs = [()]
+        digest = hashlib.md5()
+        for record in patterns:
+            data = pattern_bytes(record)
+            if not data:
+                continue
+            digest.update(str(record["id"]).encode("utf-8") + b"\0" + data + b"\0")
+            pattern_index = len(self.patterns)
+            self.patterns.append({
+                "id": record["id"],
+                "name": record.get("name", record["id"]),
+                "length": len(data)
+            })
+            state = 0
+            for byte in data:
+                next_state = goto[state].get(byte)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][byte] = next_state
+                    goto.append({})
+                    outputs.append(())
+                state = next_state
+            outputs[state] = outputs[state] + (pattern_index,)
+
+        # Breadth-first pass for failure links, merging outputs along the failure chain
+        fail = [0] * len(goto)
+        order = list(goto[0].values())
+        for state in order:
+            for byte, next_state in goto[state].items():
+                order.append(next_state)
+                fallback = fail[state]
+                while fallback and byte not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[next_state] = goto[fallback].get(byte, 0)
+                outputs[next_state] = outputs[next_state] + outputs[fail[next_state]]
+
+        self._goto = goto
+        self._fail = fail
+        self._outputs = outputs
+        self._dfa = _LazyDFA(goto, fail, outputs)
+
+        # Identifies this pattern set, e.g. for caching per-file match results
+        self.fingerprint = digest.hexdigest()
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def __getstate__(self):
+        # The DFA rows point at each other and are cheap to rebuild, so leave them out
+        # when a matcher is sent to a volume worker process
+        state = dict(self.__dict__)
+        del state["_dfa"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._dfa = _LazyDFA(self._goto, self._fail, self._outputs)
+
+    def _current_dfa(self):
+        if self._dfa.built >= MAX_DFA_ROWS:
+            self._dfa = _LazyDFA(self._goto, self._fail, self._outputs)
+        return self._dfa
+
+    def stream(self):
+        return PatternStream(self)
+
+    def scan(self, data):
+        """Return matches for a complete buffer, see PatternStream.results"""
+        stream = self.stream()
+        stream.feed(data)
+        return stream.results()
+
+
+class PatternStream:
+    """Match state for one file; feed it consecutive chunks and patterns that span chunks still match"""
+
+    def __init__(self, matcher):
+        self.matcher = matcher
+        self.reset()
+
+    def reset(self):
+        """Forget everything fed so far, e.g. when a read has to be restarted"""
+        self.dfa = self.matcher._current_dfa()
+        self.row = self.dfa.build(self.dfa.rows[0])
+        self.offset = 0
+        self.matches = {}
+
+    def _record(self, row, end):
+        for pattern_index in row[_OUTPUTS]:
+            if pattern_index not in self.matches:
+                self.matches[pattern_index] = end
+
+    def feed(self, chunk):
+        # Iterating bytes is faster than a memoryview and lets us recover the position on a match
+        data = bytes(chunk)
+        size = len(data)
+        it = iter(data)
+        row = self.row
+        build = self.dfa.build
+        while True:
+            try:
+                for byte in it:
+                    row = row[byte]
+                    if row[_OUTPUTS]:
+                        self._record(row, self.offset + size - length_hint(it))
+                break
+            except IndexError:
+                # Reached a state whose row is not built yet
+                row = build(row)
+                if row[_OUTPUTS]:
+                    self._record(row, self.offset + size - length_hint(it))
+        self.row = row
+        self.offset += size
+
+    def results(self):
+        """Matched patterns as [{"id", "name", "offset"}] in order of first appearance"""
+        found = []
+        for pattern_index, end in sorted(self.matches.items(), key=lambda item: item[1]):
+            pattern = self.matcher.patterns[pattern_index]
+            found.append({"id": pattern["id"], "name": pattern["name"], "offset": end - pattern["length"]})
+        return found
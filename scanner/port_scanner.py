@@ -0,0 +1,435 @@
+import asyncio
+import collections
+import ipaddress
+import re
+import socket
+
+# Service labels for well-known ports
+COMMON_PORTS = {
+    20: "FTP-Data", 21: "FTP", 22: "SSH", 23: "Telnet", 25: "SMTP",
+    53: "DNS", 80: "HTTP", 110: "POP3", 135: "RPC", 139: "NetBIOS",
+    143: "IMAP", 443: "HTTPS", 445: "SMB", 993: "IMAPS", 995: "POP3S",
+    1433: "MSSQL", 3306: "MySQL", 3389: "RDP", 5432: "PostgreSQL", 5900: "VNC",
+    8080: "HTTP-Alt", 8443: "HTTPS-Alt"
+}
+
+# Ports probed when none are given: the well-known range plus common high service ports
+DEFAULT_PORTS = sorted(set(range(1, 1025)) | {1433, 3306, 3389, 5432, 5900, 8080, 8443})
+
+# Connections kept in flight at once; stays well under the default 1024 descriptor limit
+PORT_SCAN_CONCURRENCY = 500
+
+# Connections kept in flight to any one host during a multi-host sweep, so a slow host
+# cannot take over the whole pool
+PORT_SCAN_HOST_CONCURRENCY = 64
+
+# Seconds to wait for a connection before a host's round-trip time is known; after that the
+# timeout follows the measured round-trip time, kept within the probe timeout bounds
+PORT_SCAN_TIMEOUT = 0.5
+MIN_PROBE_TIMEOUT = 0.05
+MAX_PROBE_TIMEOUT = 3.0
+
+# Probes sent to a host before its round-trip time is known. They wait the full MAX_PROBE_TIMEOUT,
+# and the host gets no more probes until they are back, so a slow link is measured before
+# it is timed out while an unresponsive host costs one round of waiting
+RTT_DISCOVERY_PROBES = 8
+
+# Extra attempts for a port that timed out on a host that does answer other probes; the
+# timeout doubles on each one. Hosts that never answer are not retried
+PORT_SCAN_RETRIES = 1
+
+# Banner grabbing: total seconds per open port, seconds to wait for a service that speaks
+# first before sending it an HTTP request, and bytes read at most
+BANNER_TIMEOUT = 2.0
+BANNER_WAIT_SECONDS = 0.5
+BANNER_MAX_BYTES = 1024
+
+# Request sent to services that stay silent after connecting
+BANNER_PROBE = b"HEAD / HTTP/1.0\r\n\r\n"
+
+# Ports that expect a TLS handshake, where a plain-text request would only get an error back
+TLS_PORTS = frozenset({443, 465, 636, 993, 995, 8443})
+
+# Banner fingerprints, tried in order; the named groups product and version fill in details when present
+SERVICE_FINGERPRINTS = [(service, re.compile(pattern, re.DOTALL)) for service, pattern in (
+    ("SSH", rb"^SSH-[\d.]+-(?P<product>[^_\s-]+)[_-]?(?P<version>[^\s]*)"),
+    ("HTTP", rb"^HTTP/[\d.]+ \d{3}(?:.*?\r?\n(?i:server): *(?P<product>[^/\r\n]+)(?:/(?P<version>[^\s]+))?)?"),
+    ("FTP", rb"^220[ -][^\r\n]*?(?P<product>vsFTPd|ProFTPD|Pure-FTPd|FileZilla Server|Microsoft FTP Service)"
+            rb"(?:[ /]v?(?P<version>\d[\w.-]*))?"),
+    ("SMTP", rb"^220[ -][^\r\n]*?(?P<product>Postfix|Exim|Sendmail|Microsoft ESMTP MAIL Service)"
+             rb"(?:[ /](?P<version>\d[\w.-]*))?"),
+    ("FTP", rb"^220[ -][^\r\n]*(?i:ftp)"),
+    ("SMTP", rb"^220[ -][^\r\n]*(?i:smtp)"),
+    ("POP3", rb"^\+OK(?: (?P<product>Dovecot))?"),
+    ("IMAP", rb"^\* OK(?: \[[^\]]*\])?(?: (?P<product>Dovecot|Cyrus|Courier))?"),
+    ("MySQL", rb"^.{3}\x00\x0a(?P<version>\d[\w.-]*)\x00"),
+    ("VNC", rb"^RFB (?P<version>\d{3}\.\d{3})"),
+    ("Telnet", rb"^\xff[\xfb-\xfe]"),
+)]
+
+# Largest number of hosts a sweep expands to, e.g. a /16; guards against a mistyped prefix length
+MAX_SWEEP_HOSTS = 65536
+
+
+# Function: Label a port with its well-known service name
+def port_service(port):
+    return COMMON_PORTS.get(port, "Unknown")
+
+
+# Function: Identify the service behind an open port from its banner
+def identify_service(port, banner=None):
+    """Return the port entry {"port", "service"}; with a banner (bytes, possibly empty) it also
+    carries "banner" (first line, printable text), "product" and "version" (None when unknown)"""
+    entry = {"port": port, "service": port_service(port)}
+    if banner is None:
+        return entry
+    entry.update(banner=_banner_text(banner), product=None, version=None)
+    for service, pattern in SERVICE_FINGERPRINTS:
+        match = pattern.match(banner)
+        if match:
+            entry["service"] = service
+            details = match.groupdict()
+            for key in ("product", "version"):
+                if details.get(key):
+                    entry[key] = details[key].decode("latin-1").strip()
+            break
+    return entry
+
+
+def _banner_text(banner):
+    line = banner.split(b"\n", 1)[0].rstrip(b"\r")
+    return re.sub(r"[^\x20-\x7e]", ".", line.decode("latin-1"))[:256]
+
+
+# Function: Parse a port expression such as "22,80,8000-8100" into a sorted list of ports
+def parse_ports(spec):
+    """Accepts None (the default ports), a port number, an expression string or an iterable of ports"""
+    if spec is None:
+        return list(DEFAULT_PORTS)
+    if isinstance(spec, int):
+        spec = [spec]
+    if isinstance(spec, str):
+        ports = set()
+        for part in re.split(r"[,\s]+", spec.strip()):
+            if not part:
+                continue
+            match = re.fullmatch(r"(\d+)(?:-(\d+))?", part)
+            if not match:
+                raise ValueError(f"Invalid port expression: {part}")
+            first = int(match.group(1))
+            last = int(match.group(2) or first)
+            if not 1 <= first <= last <= 65535:
+                raise ValueError(f"Invalid port range: {part}")
+            ports.update(range(first, last + 1))
+    else:
+        ports = set(spec)
+        if any(not 1 <= port <= 65535 for port in ports):
+            raise ValueError("Ports must be between 1 and 65535")
+    if not ports:
+        raise ValueError("No ports to scan")
+    return sorted(ports)
+
+
+# Function: Expand host names, addresses and CIDR ranges into individual targets
+def expand_targets(targets):
+    """Return (label, address) pairs in the given order; address is None for names still to resolve.
+
+    targets is a list or a comma/space separated string, e.g. "192.168.1.0/24, db.local".
+    """
+    if isinstance(targets, str):
+        targets = re.split(r"[,\s]+", targets.strip())
+    expanded = []
+    seen = set()
+    for target in targets:
+        if not target:
+            continue
+        try:
+            network = ipaddress.ip_network(target, strict=False)
+        except ValueError:
+            network = None
+        if network is None:
+            addresses = [(target, None)]
+        elif network.num_addresses == 1:
+            addresses = [(str(network.network_address), str(network.network_address))]
+        else:
+            if len(expanded) + network.num_addresses > MAX_SWEEP_HOSTS:
+                raise ValueError(f"{target} expands past {MAX_SWEEP_HOSTS} hosts")
+            # hosts() leaves out the network and broadcast addresses
+            addresses = [(str(address), str(address)) for address in network.hosts()]
+        for label, address in addresses:
+            if label not in seen:
+                seen.add(label)
+                expanded.append((label, address))
+        if len(expanded) > MAX_SWEEP_HOSTS:
+            raise ValueError(f"Targets expand past {MAX_SWEEP_HOSTS} hosts")
+    if not expanded:
+        raise ValueError("No hosts to scan")
+    return expanded
+
+
+# Function: Resolve a host name or address once, before any probes
+async def resolve_host(host):
+    """Return (family, address) for the first TCP address of host"""
+    infos = await asyncio.get_running_loop().getaddrinfo(host, None, type=socket.SOCK_STREAM)
+    family, _, _, _, sockaddr = infos[0]
+    return family, sockaddr[0]
+
+
+async def _bounded(awaitable, timeout):
+    if hasattr(asyncio, "timeout"):
+        # Cheaper than wait_for, which wraps every call in its own task
+        async with asyncio.timeout(timeout):
+            return await awaitable
+    return await asyncio.wait_for(awaitable, timeout)
+
+
+# Function: Read what a freshly connected service sends, prompting silent ones with an HTTP request
+async def grab_banner(sock, port, timeout=BANNER_TIMEOUT):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    try:
+        return await _bounded(loop.sock_recv(sock, BANNER_MAX_BYTES), min(BANNER_WAIT_SECONDS, timeout))
+    except asyncio.TimeoutError:
+        pass
+    except OSError:
+        return b""
+    if port in TLS_PORTS:
+        return b""
+    try:
+        await loop.sock_sendall(sock, BANNER_PROBE)
+        return await _bounded(loop.sock_recv(sock, BANNER_MAX_BYTES), max(0, deadline - loop.time()))
+    except (asyncio.TimeoutError, OSError):
+        return b""
+
+
+# Function: Try one TCP connection
+async def probe_port(family, address, port, timeout=PORT_SCAN_TIMEOUT, banner_timeout=None):
+    """Return (state, rtt, banner). state is "open", "closed" (connection refused) or "filtered"
+    (no answer in time); rtt is the connect round trip in seconds when the host answered;
+    banner is grabbed from open ports when banner_timeout is given, else None"""
+    loop = asyncio.get_running_loop()
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setblocking(False)
+    started = loop.time()
+    try:
+        await _bounded(loop.sock_connect(sock, (address, port)), timeout)
+        rtt = loop.time() - started
+        # Read the banner on the probe's own connection, so open ports cost no second connect
+        banner = await grab_banner(sock, port, banner_timeout) if banner_timeout is not None else None
+        return "open", rtt, banner
+    except asyncio.TimeoutError:
+        return "filtered", None, None
+    except ConnectionRefusedError:
+        return "closed", loop.time() - started, None
+    except OSError:
+        # Unreachable host or network, or the connection was reset
+        return "filtered", None, None
+    finally:
+        sock.close()
+
+
+class RttEstimator:
+    """Smoothed round-trip time of one host and the probe timeout derived from it, as TCP does (RFC 6298)"""
+
+    def __init__(self, initial_timeout=PORT_SCAN_TIMEOUT):
+        self.initial_timeout = initial_timeout
+        self.srtt = None
+        self.rttvar = None
+        self.samples = 0
+
+    def update(self, rtt):
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+            self.srtt = 0.875 * self.srtt + 0.125 * rtt
+        self.samples += 1
+
+    @property
+    def timeout(self):
+        if self.srtt is None:
+            return self.initial_timeout
+        return min(MAX_PROBE_TIMEOUT, max(MIN_PROBE_TIMEOUT, self.srtt + 4 * self.rttvar))
+
+
+class _HostScan:
+    """Probe state and results for one host of a sweep"""
+
+    def __init__(self, label, address=None, family=None, ports=(), timeout=None):
+        self.label = label
+        self.address = address
+        self.family = family
+        self.pending = iter(ports)
+        self.retries = collections.deque()
+        self.in_flight = 0
+        self.probes_sent = 0
+        # A fixed timeout, or None to derive it from the host's round-trip times
+        self.fixed_timeout = timeout
+        self.rtt = RttEstimator()
+        self.open_ports = {}
+        self.closed = 0
+        self.filtered = 0
+        self.retried = 0
+        self.error = None
+
+    @property
+    def discovering(self):
+        """True while the first probes to a host are out and nothing has answered yet"""
+        # Probes only start again once every probe of the first round has come back
+        return (self.fixed_timeout is None and not self.rtt.samples
+                and self.probes_sent >= RTT_DISCOVERY_PROBES > self.probes_sent - self.in_flight)
+
+    def probe_timeout(self, attempt):
+        if self.fixed_timeout is not None:
+            return self.fixed_timeout
+        if not self.rtt.samples and self.probes_sent <= RTT_DISCOVERY_PROBES:
+            return MAX_PROBE_TIMEOUT
+        return min(MAX_PROBE_TIMEOUT, self.rtt.timeout * 2 ** attempt)
+
+    def result(self):
+        result = {
+            "host": self.label,
+            "address": self.address,
+            "open_ports": [self.open_ports[port] for port in sorted(self.open_ports)],
+            "closed_ports": self.closed,
+            "filtered_ports": self.filtered,
+            "retried_ports": self.retried,
+            "rtt_ms": round(self.rtt.srtt * 1000, 2) if self.rtt.srtt is not None else None
+        }
+        if self.error:
+            result["error"] = self.error
+        return result
+
+
+class _SweepScheduler:
+    """Hands out probes round-robin across hosts, with at most host_limit in flight per host.
+
+    Hosts join the rotation only when no active host can take another probe, so a large
+    range is worked through a window of hosts instead of opening all of them at once.
+    """
+
+    def __init__(self, hosts, host_limit):
+        self._waiting = iter(hosts)
+        self._active = collections.deque()
+        self._host_limit = host_limit
+        self._changed = asyncio.Event()
+        self.finished = False
+
+    def _take(self, host):
+        if host.in_flight >= self._host_limit or host.discovering:
+            return None
+        if host.retries:
+            port, attempt = host.retries.popleft()
+        else:
+            port, attempt = next(host.pending, None), 0
+            if port is None:
+                return None
+        host.in_flight += 1
+        host.probes_sent += 1
+        return host, port, attempt
+
+    def next_probe(self):
+        """Return (host, port, attempt) for the next probe, or None when none can start now"""
+        active = self._active
+        for _ in range(len(active)):
+            host = active.popleft()
+            probe = self._take(host)
+            # A host with probes in flight stays in the rotation, since they may come back for a retry
+            if probe or host.in_flight:
+                active.append(host)
+            if probe:
+                return probe
+        for host in self._waiting:
+            probe = self._take(host)
+            if probe:
+                active.append(host)
+                return probe
+        self.finished = not active
+        return None
+
+    def retry(self, host, port, attempt):
+        host.in_flight -= 1
+        host.retried += 1
+        host.retries.append((port, attempt))
+        self._changed.set()
+
+    def complete(self, host, port, state, entry=None):
+        host.in_flight -= 1
+        if state == "open":
+            host.open_ports[port] = entry
+        elif state == "closed":
+            host.closed += 1
+        else:
+            host.filtered += 1
+        self._changed.set()
+
+    async def wait(self):
+        self._changed.clear()
+        await self._changed.wait()
+
+
+# Function: Resolve sweep targets into hosts ready to probe
+async def _prepare_hosts(targets, ports, timeout=None):
+    hosts = []
+    for label, address in expand_targets(targets):
+        if address is not None:
+            family = socket.AF_INET6 if ":" in address else socket.AF_INET
+            hosts.append(_HostScan(label, address, family, ports, timeout))
+        else:
+            hosts.append(_HostScan(label, timeout=timeout))
+
+    async def resolve(host, ports):
+        try:
+            host.family, host.address = await resolve_host(host.label)
+            host.pending = iter(ports)
+        except OSError as e:
+            host.error = f"Could not resolve host: {e}"
+
+    await asyncio.gather(*(resolve(host, ports) for host in hosts if host.address is None))
+    return hosts
+
+
+# Function: Connect-scan a set of hosts, sharing the connection pool fairly between them
+async def sweep_async(targets, ports=None, concurrency=PORT_SCAN_CONCURRENCY, host_concurrency=PORT_SCAN_HOST_CONCURRENCY,
+                      timeout=None, retries=PORT_SCAN_RETRIES, banners=False, banner_timeout=BANNER_TIMEOUT,
+                      on_open=None):
+    """Return per-host results (see _HostScan.result) in target order.
+
+    targets and ports take the forms accepted by expand_targets and parse_ports.
+    With timeout=None each host's probe timeout adapts to its measured round-trip time;
+    a number fixes it instead. Ports that time out on a host that answers other probes
+    are tried up to retries more times.
+    With banners, each open port is fingerprinted by the worker that found it while the
+    other workers carry on connecting. on_open(host, entry) is called for each open port.
+    """
+    ports = parse_ports(ports)
+    hosts = await _prepare_hosts(targets, ports, timeout)
+    scheduler = _SweepScheduler(hosts, max(1, host_concurrency))
+
+    async def worker():
+        while True:
+            probe = scheduler.next_probe()
+            if probe is None:
+                if scheduler.finished:
+                    return
+                # Every active host is at its limit; wait for a probe to come back
+                await scheduler.wait()
+                continue
+            host, port, attempt = probe
+            state, rtt, banner = await probe_port(host.family, host.address, port, host.probe_timeout(attempt),
+                                                  banner_timeout if banners else None)
+            if rtt is not None:
+                host.rtt.update(rtt)
+            elif state == "filtered" and attempt < retries and host.rtt.samples:
+                # No answer from a host that answers other probes: maybe a lost packet, so try again
+                scheduler.retry(host, port, attempt + 1)
+                continue
+            entry = identify_service(port, banner) if state == "open" else None
+            scheduler.complete(host, port, state, entry)
+            if entry and on_open:
+                on_open(host.label, entry)
+
+    workers = max(1, min(concurrency, len(hosts) * len(ports)))
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    return [host.result() for host in hosts]
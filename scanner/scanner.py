@@ -1,6 +1,9 @@
 import os
 import hashlib
 import tempfile
+import io
+import zipfile
+import asyncio
 
 import requests
 import socket
@@ -9,10 +12,26 @@ import json
 import platform
 import time
 import sys
+import re
+import fnmatch
+import queue
+import heapq
+import threading
+import mmap
+import stat
+import struct
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import contextmanager
 from datetime import datetime
 import ctypes
 from colorama import init, Fore, Style
 import jwt
+from pattern_engine import PatternMatcher
+from signature_db import SignatureDB
+from port_scanner import (PORT_SCAN_CONCURRENCY, PORT_SCAN_HOST_CONCURRENCY, PORT_SCAN_RETRIES, BANNER_TIMEOUT,
+                          parse_ports, sweep_async)
+from socket_table import group_open_ports, list_listening_sockets
 # Initialize colorama for colored console output
 init()
 
@@ -147,144 +166,1978 @@ def get_defender_status():
         return {"error": "Could not retrieve Windows Defender status"}
 
 
-# Function: Expanded malware signatures database
+# Function: Built-in malware signatures, used until an external signature file is installed
+# Each record carries the size of the known sample (None when unknown) so that
+# files of any other size can be ruled out without reading them
+def get_builtin_malware_signatures():
+    return [
+        {"md5": "e99a18c428cb38d5f260853678922e03", "name": "Trojan.Generic", "size": 6},
+        {"md5": "c157a79031e1c40f85931829bc5fc552", "name": "Ransomware.WannaCry", "size": None},
+        {"md5": "5f4dcc3b5aa765d61d8327deb882cf99", "name": "Malware.Password", "size": 8},
+        {"md5": "25f9e794323b453885f5181f1b624d0b", "name": "Trojan.Downloader", "size": 9},
+        {"md5": "827ccb0eea8a706c4c34a16891f84e7b", "name": "Backdoor.Remote", "size": 5},
+        {"md5": "e10adc3949ba59abbe56e057f20f883e", "name": "Keylogger.Common", "size": 6},
+        {"md5": "098f6bcd4621d373cade4e832627b4f6", "name": "Worm.Network", "size": 4},
+        {"md5": "00000000000000000000000000000000", "name": "Suspicious.EmptyHash", "size": None},
+        {"md5": "ffffffffffffffffffffffffffffffff", "name": "Obfuscated.FakeHash", "size": None},
+        {"md5": "1d56a37fb6b08aa709fe90e12ca59e12", "name": "PUP.ToolbarInstaller", "size": None},
+        {"md5": "7c6a180b36896a0a8c02787eeafb0e4c", "name": "Adware.PopUpBomb", "size": 9},
+        {"md5": "d41d8cd98f00b204e9800998ecf8427e", "name": "Empty.File", "size": 0},
+        {"md5": "45c48cce2e2d7fbdea1afc51c7c6ad26", "name": "Spyware.ScreenWatcher", "size": 1},
+        {"md5": "3d4fe7c9af83ee5466a0ec61b6a3fbdc", "name": "Trojan.Injector", "size": None},
+        {"md5": "6c569aabbf7775ef8fc570e228c16b98", "name": "Rootkit.StealthMode", "size": 9},
+        {"md5": "3c59dc048e8850243be8079a5c74d079", "name": "Malicious.Script.Loop", "size": 2},
+        {"md5": "21232f297a57a5a743894a0e4a801fc3", "name": "BruteForce.HashList", "size": 5}
+    ]
+
+
+# Function: Built-in byte patterns searched for anywhere inside a file
+# Each record has an id, a name and the pattern as "hex" or latin-1 "text"
+def get_builtin_malware_patterns():
+    return [
+        {"id": "EICAR-TEST-001", "name": "EICAR.TestFile",
+         "text": "X5O!P%@AP[4\\PZX54(P^)7CC)7}$EICAR-STANDARD-ANTIVIRUS-TEST-FILE!$H+H*"}
+    ]
+
+
+# Function: Resolve the patterns scan option into a compiled matcher (or None when disabled)
+def get_pattern_matcher(patterns):
+    if not patterns:
+        return None
+    if isinstance(patterns, PatternMatcher):
+        return patterns
+    if patterns is True:
+        return get_signature_store().matcher()
+    return PatternMatcher(patterns)
+
+
+# Digest algorithms that signature records may use, in the order matches are reported
+SIGNATURE_HASH_ALGORITHMS = ("md5", "sha1", "sha256")
+
+
+# Bytes hashed for the cheap prefix fingerprint checked before a full-file digest
+TRIAGE_PREFIX_SIZE = 64 * 1024
+
+
+class SignatureIndex:
+    """Lookup tables built once per scan from the signature records.
+
+    A SignatureDB passed as database is searched in place alongside the in-memory
+    tables, so large signature feeds never have to be loaded into dicts.
+    """
+
+    def __init__(self, signatures, database=None):
+        self.database = database
+        # One digest -> record table per algorithm, so each lookup is a single dict probe
+        self.by_algorithm = {algorithm: {} for algorithm in SIGNATURE_HASH_ALGORITHMS}
+        self.sizes = set()
+        # A signature without a known size can match a file of any size,
+        # so while one is loaded the size index cannot exclude anything
+        self.has_unsized = False
+        # (size, prefix_md5) fingerprints, and sizes with a signature that has no fingerprint
+        self.fingerprints = set()
+        self.unfingerprinted_sizes = set()
+        for record in signatures:
+            for algorithm in SIGNATURE_HASH_ALGORITHMS:
+                if record.get(algorithm):
+                    self.by_algorithm[algorithm][record[algorithm].lower()] = record
+            size = record.get("size")
+            if size is None:
+                self.has_unsized = True
+                continue
+            self.sizes.add(size)
+
+            prefix = record.get("prefix_md5")
+            if not prefix and size <= TRIAGE_PREFIX_SIZE and record.get("md5"):
+                # For small samples the prefix is the whole file
+                prefix = record["md5"]
+            if prefix:
+                self.fingerprints.add((size, prefix.lower()))
+            else:
+                self.unfingerprinted_sizes.add(size)
+
+        # Only algorithms that some signature uses are computed during a scan
+        db_algorithms = database.algorithms if database else ()
+        self.algorithms = tuple(a for a in SIGNATURE_HASH_ALGORITHMS if self.by_algorithm[a] or a in db_algorithms)
+        self._fingerprint = None
+
+    @property
+    def fingerprint(self):
+        """Identifies these signatures, e.g. for caching archive member results; computed on first use"""
+        if self._fingerprint is None:
+            digest = hashlib.md5()
+            for algorithm in SIGNATURE_HASH_ALGORITHMS:
+                for key, record in sorted(self.by_algorithm[algorithm].items()):
+                    digest.update(f"{algorithm}:{key}:{record.get('name')}:{record.get('size')}\n".encode())
+            if self.database:
+                digest.update(f"db:{self.database.fingerprint}".encode())
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    def size_may_match(self, size):
+        return self.has_unsized or size in self.sizes or bool(self.database and self.database.size_may_match(size))
+
+    def needs_triage(self, size):
+        """True if a prefix fingerprint can rule this file out before the full digest"""
+        # Files no bigger than the prefix cost the same to hash in full.
+        # The database holds no prefix fingerprints, so its sizes always get the full digest.
+        return (size > TRIAGE_PREFIX_SIZE
+                and not self.has_unsized
+                and size not in self.unfingerprinted_sizes
+                and not (self.database and self.database.size_may_match(size)))
+
+    def prefix_may_match(self, size, prefix_md5):
+        return (size, prefix_md5) in self.fingerprints
+
+    def match(self, digests):
+        """Return (algorithm, record) for the first digest found in its index, or (None, None)"""
+        for algorithm in self.algorithms:
+            record = self.by_algorithm[algorithm].get(digests.get(algorithm))
+            if record is None and self.database:
+                record = self.database.lookup(algorithm, digests.get(algorithm))
+            if record:
+                return algorithm, record
+        return None, None
+
+
+# External signature file: {"version": N, "signatures": [...], "patterns": [...], "database": "x.sdb"}
+SIGNATURE_FILE = os.path.join(os.path.expanduser("~"), ".security_scanner", "signatures.json")
+# How often a running process checks the signature file for a newer version
+SIGNATURE_RELOAD_CHECK_SECONDS = 10
+
+
+class SignatureStore:
+    """Signature set loaded from a versioned external file.
+
+    The file is parsed lazily, once per process, and the result is kept as an immutable
+    snapshot. current() checks the file at most every check_interval seconds and swaps in
+    a new snapshot only when its version is newer, so a long scan picks up updates
+    without restarting. Until a valid file exists the built-in signatures are version 0.
+
+    Scans hold a snapshot through acquire(); the database of a replaced snapshot is
+    closed once the last holder releases it, so the old feed file can be replaced.
+    """
+
+    def __init__(self, path=SIGNATURE_FILE, check_interval=SIGNATURE_RELOAD_CHECK_SECONDS):
+        self.path = path
+        self.check_interval = check_interval
+        self.reloads = 0
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._file_key = None
+        self._next_check = 0
+
+    @staticmethod
+    def _make_snapshot(version, source, signatures, patterns, database=None):
+        return {
+            "version": version,
+            "source": source,
+            "signatures": signatures,
+            "patterns": patterns,
+            "database": database,
+            # Built on first use, see index() and matcher()
+            "index": None,
+            "matcher": None,
+            # Scans holding the snapshot through acquire(), and whether a newer one replaced it
+            "users": 0,
+            "retired": False
+        }
+
+    @staticmethod
+    def _close(snapshot):
+        if snapshot["database"] is not None:
+            snapshot["database"].close()
+
+    def _load(self):
+        """Parse the signature file into a snapshot; raises on a missing or invalid file"""
+        with open(self.path, 'r', encoding="utf-8") as f:
+            data = json.load(f)
+        version = int(data["version"])
+        database = None
+        if data.get("database"):
+            # A large hash feed ships as a binary database next to the JSON file
+            db_path = os.path.join(os.path.dirname(self.path), data["database"])
+            database = SignatureDB(db_path)
+        return self._make_snapshot(version, self.path, list(data.get("signatures", [])),
+                                   list(data.get("patterns", get_builtin_malware_patterns())), database)
+
+    def _refresh(self):
+        try:
+            st = os.stat(self.path)
+            file_key = (st.st_size, st.st_mtime_ns, st.st_ino)
+        except OSError:
+            file_key = None
+        if self._snapshot is not None and file_key == self._file_key:
+            return
+        self._file_key = file_key
+
+        snapshot = None
+        if file_key is not None:
+            try:
+                snapshot = self._load()
+            except (OSError, ValueError, KeyError, TypeError, struct.error) as e:
+                print(f"{Fore.RED}[!] Could not load signatures from {self.path}: {str(e)}{Style.RESET_ALL}")
+        if self._snapshot is None:
+            self._snapshot = snapshot or self._make_snapshot(0, "builtin", get_builtin_malware_signatures(),
+                                                             get_builtin_malware_patterns())
+        elif snapshot and (self._snapshot["source"] == "builtin" or snapshot["version"] > self._snapshot["version"]):
+            # Swapping the reference is atomic; scans still holding the old snapshot finish with it
+            retired, self._snapshot = self._snapshot, snapshot
+            retired["retired"] = True
+            if not retired["users"]:
+                self._close(retired)
+            self.reloads += 1
+            print(f"{Fore.CYAN}[*] Loaded signature version {snapshot['version']}{Style.RESET_ALL}")
+        elif snapshot:
+            # Not newer than the one in use, so nothing else will ever see it
+            self._close(snapshot)
+
+    def current(self):
+        """Return the current snapshot, reloading it first if a newer version is on disk"""
+        now = time.monotonic()
+        if self._snapshot is None or now >= self._next_check:
+            with self._lock:
+                if self._snapshot is None or now >= self._next_check:
+                    self._refresh()
+                    self._next_check = now + self.check_interval
+        return self._snapshot
+
+    @contextmanager
+    def acquire(self):
+        """Hold the current snapshot so a reload does not close its database while it is in use"""
+        self.current()
+        with self._lock:
+            snapshot = self._snapshot
+            snapshot["users"] += 1
+        try:
+            yield snapshot
+        finally:
+            with self._lock:
+                snapshot["users"] -= 1
+                if snapshot["retired"] and not snapshot["users"]:
+                    self._close(snapshot)
+
+    def index(self, database=None, snapshot=None):
+        """SignatureIndex for snapshot (default: the current one), searching database (or the snapshot's own) too.
+
+        Only the index over the snapshot's own database is cached. One over a caller's database
+        is built on every call, so the caller keeps it for as long as that database is open.
+        """
+        snapshot = snapshot or self.current()
+        if database is not None:
+            return SignatureIndex(snapshot["signatures"], database)
+        if snapshot["index"] is None:
+            with self._lock:
+                if snapshot["index"] is None:
+                    snapshot["index"] = SignatureIndex(snapshot["signatures"], snapshot["database"])
+        return snapshot["index"]
+
+    def matcher(self, snapshot=None):
+        """PatternMatcher compiled from snapshot's patterns (default: the current snapshot's)"""
+        snapshot = snapshot or self.current()
+        if snapshot["matcher"] is None:
+            with self._lock:
+                if snapshot["matcher"] is None:
+                    snapshot["matcher"] = PatternMatcher(snapshot["patterns"])
+        return snapshot["matcher"]
+
+
+_signature_store = None
+_signature_store_lock = threading.Lock()
+
+
+# Function: The process-wide signature store
+def get_signature_store():
+    global _signature_store
+    if _signature_store is None:
+        with _signature_store_lock:
+            if _signature_store is None:
+                _signature_store = SignatureStore()
+    return _signature_store
+
+
+# Function: Malware signatures currently in effect (external file if installed, else built-in)
 def get_malware_signatures():
-    return {
-        "e99a18c428cb38d5f260853678922e03": "Trojan.Generic",
-        "c157a79031e1c40f85931829bc5fc552": "Ransomware.WannaCry",
-        "5f4dcc3b5aa765d61d8327deb882cf99": "Malware.Password",
-        "25f9e794323b453885f5181f1b624d0b": "Trojan.Downloader",
-        "827ccb0eea8a706c4c34a16891f84e7b": "Backdoor.Remote",
-        "e10adc3949ba59abbe56e057f20f883e": "Keylogger.Common",
-        "098f6bcd4621d373cade4e832627b4f6": "Worm.Network",
-        "00000000000000000000000000000000": "Suspicious.EmptyHash",
-        "ffffffffffffffffffffffffffffffff": "Obfuscated.FakeHash",
-        "1d56a37fb6b08aa709fe90e12ca59e12": "PUP.ToolbarInstaller",
-        "7c6a180b36896a0a8c02787eeafb0e4c": "Adware.PopUpBomb",
-        "d41d8cd98f00b204e9800998ecf8427e": "Empty.File",
-        "45c48cce2e2d7fbdea1afc51c7c6ad26": "Spyware.ScreenWatcher",
-        "3d4fe7c9af83ee5466a0ec61b6a3fbdc": "Trojan.Injector",
-        "6c569aabbf7775ef8fc570e228c16b98": "Rootkit.StealthMode",
-        "3c59dc048e8850243be8079a5c74d079": "Malicious.Script.Loop",
-        "21232f297a57a5a743894a0e4a801fc3": "BruteForce.HashList"
-    }
+    return get_signature_store().current()["signatures"]
 
 
+# Function: Byte patterns currently in effect
+def get_malware_patterns():
+    return get_signature_store().current()["patterns"]
 
-# Function: Scan Files for Malware Signatures (Enhanced)
-def scan_files(directory, callback=None):
-    known_hashes = get_malware_signatures()
-    infected_files = []
-    scanned_files = 0
-    skipped_files = 0
-    start_time = time.time()
 
-    # List of file extensions to prioritize scanning
-    risky_extensions = ['.exe', '.dll', '.bat', '.cmd', '.ps1', '.vbs', '.js', '.jar', '.zip', '.rar']
+def _signature_key(record):
+    # A signature is identified by its first digest, e.g. "md5:<hex>" - the backend uses the same key
+    for algorithm in SIGNATURE_HASH_ALGORITHMS:
+        if record.get(algorithm):
+            return f"{algorithm}:{record[algorithm].lower()}"
+    return None
 
-    print(f"{Fore.CYAN}[*] Scanning directory: {directory}{Style.RESET_ALL}")
 
-    # Get total files for progress reporting
-    total_files = 0
-    for root, _, files in os.walk(directory):
-        total_files += len(files)
+# Function: Fetch signature changes from the backend and apply them to the local signature file
+def sync_signatures(backend_url=None, path=SIGNATURE_FILE):
+    """Bring the local signature file up to the backend's version.
 
-    # Start scanning
-    for root, _, files in os.walk(directory):
-        for file in files:
-            scanned_files += 1
+    Only the changes since the local version are downloaded, and an up-to-date
+    scanner gets an empty 304. The file is replaced atomically, so running scans
+    pick the new version up on their next reload check. Hashes kept in a binary
+    database referenced by the file are not touched by deltas.
+    """
+    local = {}
+    try:
+        with open(path, 'r', encoding="utf-8") as f:
+            local = json.load(f)
+    except (OSError, ValueError):
+        pass
+    version = int(local.get("version", 0))
 
-            if callback and scanned_files % 50 == 0:  # Update progress every 50 files
-                progress = (scanned_files / total_files) * 100
-                callback(int(progress), scanned_files, total_files)
+    headers = {"If-None-Match": f'"signatures-{version}"'}
+    if TOKEN:
+        headers['Authorization'] = TOKEN if TOKEN.startswith("Bearer ") else f"Bearer {TOKEN}"
+    endpoint = f"{(backend_url or BACKEND_URL).rstrip('/')}/download/signatures"
 
-            file_path = os.path.join(root, file)
-            file_ext = os.path.splitext(file)[1].lower()
+    try:
+        response = requests.get(endpoint, headers=headers, params={"since": version}, timeout=30)
+    except requests.RequestException as e:
+        return {"success": False, "error": f"Request failed: {str(e)}"}
 
-            # Skip very large files to improve performance
-            try:
-                if os.path.getsize(file_path) > 100 * 1024 * 1024:  # Skip files larger than 100MB
-                    skipped_files += 1
-                    continue
+    if response.status_code == 304:
+        return {"success": True, "updated": False, "version": version}
+    if response.status_code == 401:
+        return {"success": False, "error": "Authentication failed. Please login again."}
+    try:
+        update = response.json()
+    except ValueError:
+        return {"success": False, "error": f"Server returned non-JSON response: {response.text}"}
+    if response.status_code != 200:
+        return {"success": False, "error": update.get("error", f"HTTP Error: {response.status_code}")}
+
+    if update.get("type") == "full":
+        local["signatures"] = update.get("signatures", [])
+        local["patterns"] = update.get("patterns", [])
+        added, removed = len(local["signatures"]), 0
+    else:
+        # Drop removed entries and older copies of re-added ones, then append the additions
+        added_signatures = {_signature_key(record): record for record in update.get("added", [])}
+        dropped = set(update.get("removed", [])) | set(added_signatures)
+        local["signatures"] = ([record for record in local.get("signatures", [])
+                                if _signature_key(record) not in dropped]
+                               + list(added_signatures.values()))
+        added_patterns = {record["id"]: record for record in update.get("patterns_added", [])}
+        dropped = set(update.get("patterns_removed", [])) | set(added_patterns)
+        local["patterns"] = ([record for record in local.get("patterns", get_builtin_malware_patterns())
+                              if record["id"] not in dropped]
+                             + list(added_patterns.values()))
+        added, removed = len(added_signatures), len(update.get("removed", []))
+    local["version"] = int(update["version"])
 
-                # Prioritize scanning risky file extensions
-                if file_ext in risky_extensions:
-                    with open(file_path, "rb") as f:
-                        file_hash = hashlib.md5(f.read()).hexdigest()
-                    if file_hash in known_hashes:
-                        infected_files.append({
-                            "file": file_path,
-                            "malware": known_hashes[file_hash],
-                            "hash": file_hash,
-                            "size": os.path.getsize(file_path)
-                        })
-                        print(
-                            f"{Fore.RED}[!] Found infected file: {file_path} - {known_hashes[file_hash]}{Style.RESET_ALL}")
+    try:
+        signature_dir = os.path.dirname(path)
+        if signature_dir:
+            os.makedirs(signature_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=signature_dir or None, suffix=".tmp")
+        with os.fdopen(fd, 'w', encoding="utf-8") as f:
+            json.dump(local, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        return {"success": False, "error": f"Could not write signatures: {str(e)}"}
+
+    store = get_signature_store()
+    if store.path == path:
+        # Load the new version on the next lookup instead of after the check interval
+        store._next_check = 0
+    print(f"{Fore.GREEN}[✓] Signatures updated to version {local['version']} "
+          f"({update.get('type', 'delta')}: +{added}/-{removed}){Style.RESET_ALL}")
+    return {"success": True, "updated": True, "version": local["version"], "type": update.get("type", "delta"),
+            "added": added, "removed": removed}
+
+
+# Read buffer size used when hashing files
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Files at least this large are hashed through a read-only memory map instead of read() calls
+# (None disables the mmap path; tune with benchmarks/bench_hash_paths.py). Windows only by default:
+# it refuses to truncate a mapped file, while on POSIX another process truncating the file
+# mid-hash makes reading the lost pages raise SIGBUS, which kills the scanner
+MMAP_HASH_THRESHOLD = 64 * 1024 * 1024 if os.name == "nt" else None
+
+# Size of each memoryview slice passed to the digests on the mmap path
+MMAP_SLICE_SIZE = 8 * 1024 * 1024
+
+# Optional file size limit in bytes for scan_files (None scans files of any size)
+MAX_SCAN_FILE_SIZE = None
+
+# Hash cache settings
+HASH_CACHE_FILE = os.path.join(os.path.expanduser("~"), ".security_scanner", "hash_cache.json")
+HASH_CACHE_MAX_AGE_DAYS = 30
+
+
+class HashCache:
+    """On-disk cache of file hashes keyed on path, size, mtime and file ID"""
+
+    def __init__(self, path=HASH_CACHE_FILE, max_age_days=HASH_CACHE_MAX_AGE_DAYS):
+        self.path = path
+        self.max_age_seconds = max_age_days * 24 * 60 * 60
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self._seen = set()
+        self._dirty = False
+        # Parallel scans share one cache between hash workers
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(file_path):
+        return os.path.normcase(os.path.abspath(file_path))
+
+    def load(self):
+        """Load cache entries from disk, starting empty if the file is missing or corrupt"""
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            self.entries = data.get("entries", {})
+        except (OSError, ValueError, AttributeError):
+            self.entries = {}
+        return self
+
+    def lookup(self, file_path, st, file_id=None, algorithms=("md5",)):
+        """Return cached digests if the file metadata is unchanged and every algorithm is cached, otherwise None"""
+        key = self._key(file_path)
+        if file_id is None:
+            file_id = st.st_ino
+        with self._lock:
+            self._seen.add(key)
+            entry = self.entries.get(key)
+            if (entry is not None
+                    and entry.get("size") == st.st_size
+                    and entry.get("mtime_ns") == st.st_mtime_ns
+                    and entry.get("file_id") == file_id):
+                # Entries written before multi-digest support only hold an md5
+                digests = entry.get("digests") or {"md5": entry.get("md5")}
+                if all(digests.get(algorithm) for algorithm in algorithms):
+                    entry["last_seen"] = int(time.time())
+                    self._dirty = True
+                    self.hits += 1
+                    return digests
+            elif entry is not None:
+                # Metadata changed - drop the stale entry
+                del self.entries[key]
+                self._dirty = True
+            self.misses += 1
+            return None
+
+    def cached_result(self, file_path, st, key, file_id=None):
+        """Return the value stored under key for an unchanged file, or None; not counted as a hit or miss"""
+        key_path = self._key(file_path)
+        if file_id is None:
+            file_id = st.st_ino
+        with self._lock:
+            # Keeps the entry from being evicted even when the file's own digests were not looked up
+            self._seen.add(key_path)
+            entry = self.entries.get(key_path)
+            if (entry is None or entry.get("size") != st.st_size or entry.get("mtime_ns") != st.st_mtime_ns
+                    or entry.get("file_id") != file_id):
+                return None
+            entry["last_seen"] = int(time.time())
+            self._dirty = True
+            return (entry.get("digests") or {}).get(key)
+
+    def store(self, file_path, st, digests, file_id=None):
+        key = self._key(file_path)
+        entry = {
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "file_id": st.st_ino if file_id is None else file_id,
+            "digests": dict(digests),
+            "last_seen": int(time.time())
+        }
+        with self._lock:
+            # Keep digests of other algorithms cached for the same unchanged file
+            previous = self.entries.get(key)
+            if previous and all(previous.get(k) == entry[k] for k in ("size", "mtime_ns", "file_id")):
+                merged = previous.get("digests") or {"md5": previous.get("md5")}
+                merged.update(entry["digests"])
+                entry["digests"] = merged
+            self.entries[key] = entry
+            self._dirty = True
+
+    def _root_prefix(self, root):
+        return self._key(root).rstrip(os.sep) + os.sep
+
+    def entries_under(self, root):
+        """Return the entries for files under root (used to hand results back from volume workers)"""
+        prefix = self._root_prefix(root)
+        with self._lock:
+            return {key: entry for key, entry in self.entries.items() if key.startswith(prefix)}
+
+    def replace_entries_under(self, root, entries):
+        """Replace every entry under root with the given entries"""
+        prefix = self._root_prefix(root)
+        with self._lock:
+            for key in [key for key in self.entries if key.startswith(prefix)]:
+                del self.entries[key]
+            self.entries.update(entries)
+            self._dirty = True
+
+    def evict_stale(self, root=None):
+        """Evict entries not refreshed within max age, and entries under root not seen in this run"""
+        now = time.time()
+        root_key = self._root_prefix(root) if root else None
+        stale = []
+        for key, entry in self.entries.items():
+            if now - entry.get("last_seen", 0) > self.max_age_seconds:
+                stale.append(key)
+            elif root_key and key.startswith(root_key) and key not in self._seen:
+                stale.append(key)
+        for key in stale:
+            del self.entries[key]
+        if stale:
+            self._dirty = True
+        self.evicted += len(stale)
+        return len(stale)
+
+    def save(self):
+        """Atomically write the cache back to disk"""
+        if not self._dirty:
+            return True
+        try:
+            cache_dir = os.path.dirname(self.path)
+            if cache_dir:
+                os.makedirs(cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=cache_dir or None, suffix=".tmp")
+            with os.fdopen(fd, 'w') as f:
+                json.dump({"entries": self.entries}, f)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+            return True
+        except Exception as e:
+            print(f"{Fore.RED}[!] Error saving hash cache: {str(e)}{Style.RESET_ALL}")
+            return False
+
+
+# Low-impact mode defaults, used when no explicit rate is given
+LOW_IMPACT_BYTES_PER_SECOND = 20 * 1024 * 1024
+LOW_IMPACT_FILES_PER_SECOND = 200
+# Read latency backoff: timed reads of at least this size are sampled, and once recent latency exceeds
+# the baseline by this factor the scan pauses for up to MAX_BACKOFF_RATIO times each read's duration
+LATENCY_SAMPLE_MIN_BYTES = 64 * 1024
+LATENCY_BACKOFF_FACTOR = 2.0
+MAX_BACKOFF_RATIO = 4.0
+
+
+class TokenBucket:
+    """Thread-safe token bucket; consume() sleeps until the caller is within the rate"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        # By default at most a tenth of a second's worth can go through in one burst
+        self.burst = burst if burst is not None else max(rate / 10, 1)
+        self.waited = 0.0
+        self._tokens = self.burst
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, amount):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            # Going into debt lets a request bigger than the burst through after a proportional wait
+            self._tokens -= amount
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+            self.waited += wait
+        if wait > 0:
+            time.sleep(wait)
+
+
+class ScanThrottle:
+    """Accounts for the bytes and files a scan reads, and optionally rate limits them.
+
+    Byte and file rates use token buckets. With adaptive set, read latency is tracked
+    against a slow-moving baseline and the scan backs off while the disk is slower
+    than usual, e.g. because a service on the machine is busy with it.
+    """
+
+    def __init__(self, bytes_per_second=None, files_per_second=None, adaptive=False):
+        self.byte_bucket = TokenBucket(bytes_per_second) if bytes_per_second else None
+        self.file_bucket = TokenBucket(files_per_second) if files_per_second else None
+        self.adaptive = adaptive
+        self.limited = bool(self.byte_bucket or self.file_bucket or adaptive)
+        self.bytes_read = 0
+        self.files = 0
+        self.backoff_seconds = 0.0
+        self._backoff = 0.0
+        self._recent_latency = None
+        self._baseline_latency = None
+        self._lock = threading.Lock()
+
+    def before_file(self):
+        with self._lock:
+            self.files += 1
+        if self.file_bucket:
+            self.file_bucket.consume(1)
+
+    def on_read(self, bytes_read, seconds=0.0):
+        """Account for a read; seconds is its duration, or 0 when the caller did not time it"""
+        delay = 0.0
+        with self._lock:
+            self.bytes_read += bytes_read
+            # An untimed read says nothing about latency and would pin the baseline at zero
+            if self.adaptive and seconds > 0 and bytes_read >= LATENCY_SAMPLE_MIN_BYTES:
+                latency = seconds / bytes_read * HASH_CHUNK_SIZE
+                if self._baseline_latency is None:
+                    self._baseline_latency = self._recent_latency = latency
+                self._recent_latency += 0.3 * (latency - self._recent_latency)
+                if self._recent_latency > self._baseline_latency * LATENCY_BACKOFF_FACTOR:
+                    self._backoff = min(MAX_BACKOFF_RATIO, self._backoff * 2 or 0.25)
                 else:
-                    # For non-risky extensions, scan with lower priority
-                    # This approach can be modified based on performance needs
-                    with open(file_path, "rb") as f:
-                        file_hash = hashlib.md5(f.read()).hexdigest()
-                    if file_hash in known_hashes:
-                        infected_files.append({
-                            "file": file_path,
-                            "malware": known_hashes[file_hash],
-                            "hash": file_hash,
-                            "size": os.path.getsize(file_path)
-                        })
-                        print(
-                            f"{Fore.RED}[!] Found infected file: {file_path} - {known_hashes[file_hash]}{Style.RESET_ALL}")
-            except Exception as e:
-                skipped_files += 1
+                    # Only learn the baseline while the disk is not contended
+                    self._baseline_latency += 0.05 * (latency - self._baseline_latency)
+                    self._backoff = self._backoff * 0.8 if self._backoff > 0.01 else 0.0
+                delay = seconds * self._backoff
+                self.backoff_seconds += delay
+        if self.byte_bucket:
+            self.byte_bucket.consume(bytes_read)
+        if delay:
+            time.sleep(delay)
+
+    @property
+    def wait_seconds(self):
+        return sum(bucket.waited for bucket in (self.byte_bucket, self.file_bucket) if bucket)
+
+
+# Function: Lower this process's CPU and I/O priority for a background scan
+def lower_process_priority():
+    """Return the list of adjustments that were applied (they last for the life of the process)"""
+    applied = []
+    if platform.system() == "Windows":
+        try:
+            kernel32 = ctypes.windll.kernel32
+            # Background mode lowers CPU, I/O and memory priority together
+            PROCESS_MODE_BACKGROUND_BEGIN = 0x00100000
+            BELOW_NORMAL_PRIORITY_CLASS = 0x00004000
+            process = kernel32.GetCurrentProcess()
+            if kernel32.SetPriorityClass(process, PROCESS_MODE_BACKGROUND_BEGIN):
+                applied.append("background_mode")
+            elif kernel32.SetPriorityClass(process, BELOW_NORMAL_PRIORITY_CLASS):
+                applied.append("below_normal_cpu")
+        except Exception:
+            pass
+        return applied
+
+    try:
+        os.nice(10)
+        applied.append("nice")
+    except (AttributeError, OSError):
+        pass
+    if platform.system() == "Linux":
+        try:
+            # Lowest best-effort I/O priority, so other processes' reads go first
+            subprocess.run(["ionice", "-c", "2", "-n", "7", "-p", str(os.getpid())],
+                           check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            applied.append("ionice")
+        except (OSError, subprocess.CalledProcessError):
+            pass
+    return applied
+
+
+# Function: Hash an open file through a read-only memory map
+def _hash_file_mmap(f, algorithms, pattern_stream=None, throttle=None):
+    """Return {algorithm: hexdigest} or None if the file cannot be mapped safely"""
+    try:
+        st = os.fstat(f.fileno())
+        if not stat.S_ISREG(st.st_mode) or st.st_size == 0:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            size = len(mm)
+            # A file that changed size since it was stat-ed may be mid-write - use the buffered path
+            if size != st.st_size:
+                return None
+            digests = [(algorithm, hashlib.new(algorithm)) for algorithm in algorithms]
+            with memoryview(mm) as view:
+                for offset in range(0, size, MMAP_SLICE_SIZE):
+                    # Zero-copy slice of the mapping
+                    with view[offset:offset + MMAP_SLICE_SIZE] as chunk:
+                        for _, digest in digests:
+                            digest.update(chunk)
+                        if pattern_stream:
+                            pattern_stream.feed(chunk)
+            if os.fstat(f.fileno()).st_size != size:
+                if pattern_stream:
+                    pattern_stream.reset()
+                return None
+            # Only counted once the mapped read is kept; the buffered retry reports its own reads
+            if throttle:
+                throttle.on_read(size)
+        return {algorithm: digest.hexdigest() for algorithm, digest in digests}
+    except (OSError, ValueError, BufferError):
+        # Locked, special or otherwise unmappable files; the buffered retry starts the patterns over
+        if pattern_stream:
+            pattern_stream.reset()
+        return None
+
+
+# Function: Hash a file in fixed-size chunks so memory use stays flat for any file size
+def hash_file(file_path, buffer=None, algorithms=("md5",), mmap_threshold=MMAP_HASH_THRESHOLD, size=None,
+              pattern_stream=None, throttle=None):
+    """Read the file once, feeding every chunk to each requested digest, and return {algorithm: hexdigest}
+
+    A PatternStream passed as pattern_stream is fed the same chunks, so byte patterns
+    are searched without a second read of the file. Reads are reported to throttle;
+    a rate-limited throttle needs timed reads, so it disables the mmap path.
+    """
+    if throttle and throttle.limited:
+        mmap_threshold = None
+    with open(file_path, "rb", buffering=0) as f:
+        if mmap_threshold is not None:
+            if size is None:
+                size = os.fstat(f.fileno()).st_size
+            if size >= mmap_threshold:
+                result = _hash_file_mmap(f, algorithms, pattern_stream, throttle)
+                if result is not None:
+                    return result
+                f.seek(0)
+
+        return _hash_stream(f, buffer, algorithms, pattern_stream, throttle)
+
+
+# Function: Hash a readable binary stream through a reused buffer
+def _hash_stream(f, buffer=None, algorithms=("md5",), pattern_stream=None, throttle=None):
+    if buffer is None:
+        buffer = bytearray(HASH_CHUNK_SIZE)
+    view = memoryview(buffer)
+    digests = [(algorithm, hashlib.new(algorithm)) for algorithm in algorithms]
+    while True:
+        if throttle:
+            read_start = time.perf_counter()
+            bytes_read = f.readinto(buffer)
+            throttle.on_read(bytes_read, time.perf_counter() - read_start)
+        else:
+            bytes_read = f.readinto(buffer)
+        if not bytes_read:
+            break
+        chunk = view[:bytes_read]
+        for _, digest in digests:
+            digest.update(chunk)
+        if pattern_stream:
+            pattern_stream.feed(chunk)
+    return {algorithm: digest.hexdigest() for algorithm, digest in digests}
+
+
+# Default location of the include/exclude rules config
+SCAN_RULES_FILE = os.path.join(os.path.expanduser("~"), ".security_scanner", "scan_rules.json")
+
+
+class ScanRules:
+    """Include/exclude rules compiled once into fast matchers.
+
+    Config keys (all optional):
+      "exclude_dirs"          - directory names or globs whose whole subtree is pruned, e.g. "node_modules", ".git"
+      "include" / "exclude"   - {"extensions": [...], "globs": [...], "regex": [...]}
+      "min_size" / "max_size" - file size bounds in bytes
+      "max_age_days"          - only scan files modified within this many days
+      "min_age_days"          - only scan files last modified at least this many days ago
+
+    Globs without a path separator match the file name, globs with one match the
+    path relative to the scan root, starting at a path component: "src/*.js" matches
+    "src/a.js" and "lib/src/a.js" but not "mysrc/a.js", and a leading "/" anchors the
+    glob at the root. Paths are matched written with "/" separators (and lower-cased
+    on Windows) and regexes are searched anywhere in the relative path. When any
+    include rule is given a file must match one of them; exclude rules always win.
+    """
+
+    def __init__(self, config=None):
+        config = config or {}
+        include = config.get("include", {})
+        exclude = config.get("exclude", {})
+
+        self.include_extensions, self.include_name, self.include_path = self._compile(include)
+        self.exclude_extensions, self.exclude_name, self.exclude_path = self._compile(exclude)
+        self.has_include = bool(self.include_extensions or self.include_name or self.include_path)
+
+        dir_patterns = config.get("exclude_dirs", [])
+        self.exclude_dir_names = frozenset(self._fold(p) for p in dir_patterns if not self._is_pattern(p))
+        self.exclude_dir_name_re, self.exclude_dir_path_re = self._compile_globs(
+            [p for p in dir_patterns if self._is_pattern(p)])
+
+        self.min_size = config.get("min_size")
+        self.max_size = config.get("max_size")
+        day = 24 * 60 * 60
+        self.max_age = config["max_age_days"] * day if config.get("max_age_days") is not None else None
+        self.min_age = config["min_age_days"] * day if config.get("min_age_days") is not None else None
+        self.needs_stat = any(v is not None for v in (self.min_size, self.max_size, self.max_age, self.min_age))
+        # Folded scan root -> prefix to strip from entry paths
+        self._root_prefixes = {}
+
+    @staticmethod
+    def _fold(text):
+        # Match case-insensitively where the file system is case-insensitive
+        return os.path.normcase(text).replace("\\", "/")
+
+    @staticmethod
+    def _is_pattern(text):
+        return any(ch in text for ch in "*?[/")
+
+    @classmethod
+    def _compile_globs(cls, globs):
+        """Combine globs into one regex for names and one for full paths"""
+        name_globs = [cls._fold(g) for g in globs if "/" not in g]
+        path_globs = [cls._fold(g) for g in globs if "/" in g]
+        name_re = re.compile("|".join(fnmatch.translate(g) for g in name_globs)) if name_globs else None
+        path_re = None
+        if path_globs:
+            # Searched, so each glob has to start at the root or right after a "/"
+            path_re = re.compile("|".join(
+                "^" + fnmatch.translate(g[1:]) if g.startswith("/") else "(?:^|/)" + fnmatch.translate(g)
+                for g in path_globs))
+        return name_re, path_re
+
+    @classmethod
+    def _compile(cls, rules):
+        extensions = frozenset(cls._fold(e if e.startswith(".") else "." + e) for e in rules.get("extensions", []))
+        name_re, path_re = cls._compile_globs(rules.get("globs", []))
+        regexes = [f"(?:{r})" for r in rules.get("regex", [])]
+        if regexes:
+            combined = re.compile("|".join(regexes), re.IGNORECASE if os.name == "nt" else 0)
+            path_re = re.compile(f"{path_re.pattern}|{combined.pattern}", combined.flags) if path_re else combined
+        return extensions, name_re, path_re
+
+    @staticmethod
+    def _matches(name, path, ext, extensions, name_re, path_re):
+        return ((extensions and ext in extensions)
+                or (name_re is not None and name_re.match(name))
+                or (path_re is not None and path_re.search(path)))
+
+    def _relative(self, path, root):
+        """Folded path relative to root; the whole folded path when root is None or does not contain it"""
+        path = self._fold(path)
+        if root is None:
+            return path
+        prefix = self._root_prefixes.get(root)
+        if prefix is None:
+            prefix = self._root_prefixes[root] = self._fold(root).rstrip("/") + "/"
+        return path[len(prefix):] if path.startswith(prefix) else path
+
+    def prunes_dir(self, entry, root=None):
+        """True if the directory's whole subtree should be skipped; root is the directory being scanned"""
+        name = self._fold(entry.name)
+        if name in self.exclude_dir_names:
+            return True
+        if self.exclude_dir_name_re is not None and self.exclude_dir_name_re.match(name):
+            return True
+        return (self.exclude_dir_path_re is not None
+                and bool(self.exclude_dir_path_re.search(self._relative(entry.path, root))))
+
+    def allows_file(self, entry, root=None):
+        name = self._fold(entry.name)
+        path = self._relative(entry.path, root)
+        ext = os.path.splitext(name)[1]
+
+        if self.has_include and not self._matches(name, path, ext, self.include_extensions,
+                                                  self.include_name, self.include_path):
+            return False
+        if self._matches(name, path, ext, self.exclude_extensions, self.exclude_name, self.exclude_path):
+            return False
+
+        if self.needs_stat:
+            st = entry.stat()
+            if self.min_size is not None and st.st_size < self.min_size:
+                return False
+            if self.max_size is not None and st.st_size > self.max_size:
+                return False
+            age = time.time() - st.st_mtime
+            if self.max_age is not None and age > self.max_age:
+                return False
+            if self.min_age is not None and age < self.min_age:
+                return False
+        return True
+
+
+# Function: Load include/exclude rules from a JSON config file
+def load_scan_rules(path=SCAN_RULES_FILE):
+    try:
+        with open(path, 'r') as f:
+            return ScanRules(json.load(f))
+    except (OSError, ValueError, re.error) as e:
+        print(f"{Fore.RED}[!] Could not load scan rules from {path}: {str(e)}{Style.RESET_ALL}")
+        return None
+
+
+# Function: MD5 of the first TRIAGE_PREFIX_SIZE bytes of a file
+def hash_file_prefix(file_path, buffer=None, throttle=None):
+    if buffer is None or len(buffer) < TRIAGE_PREFIX_SIZE:
+        buffer = bytearray(TRIAGE_PREFIX_SIZE)
+    view = memoryview(buffer)[:TRIAGE_PREFIX_SIZE]
+    filled = 0
+    with open(file_path, "rb", buffering=0) as f:
+        while filled < TRIAGE_PREFIX_SIZE:
+            bytes_read = f.readinto(view[filled:])
+            if not bytes_read:
+                break
+            filled += bytes_read
+    if throttle:
+        throttle.on_read(filled)
+    return hashlib.md5(view[:filled]).hexdigest()
+
+
+# Function: Build a signature record from a malware sample, computing all digests and the triage fingerprint
+def create_signature_record(sample_path, name, algorithms=SIGNATURE_HASH_ALGORITHMS):
+    record = hash_file(sample_path, algorithms=algorithms, mmap_threshold=None)
+    record["name"] = name
+    record["size"] = os.path.getsize(sample_path)
+    record["prefix_md5"] = hash_file_prefix(sample_path)
+    return record
+
+
+# Extensions scanned first by the priority scheduler
+RISKY_EXTENSIONS = ('.exe', '.dll', '.bat', '.cmd', '.ps1', '.vbs', '.js', '.jar', '.zip', '.rar')
+# Files modified within this many days are scanned before older ones
+PRIORITY_RECENT_DAYS = 7
+# Most walked files held back for ordering; past this, the best one waiting is scanned for each file walked
+PRIORITY_BUFFER_FILES = 50000
+
+
+# Function: Locations any user can drop files into, as normalized path prefixes
+def get_user_writable_roots():
+    roots = {os.path.expanduser("~"), tempfile.gettempdir()}
+    for variable in ("TEMP", "TMP", "APPDATA", "LOCALAPPDATA", "PUBLIC", "USERPROFILE"):
+        if os.environ.get(variable):
+            roots.add(os.environ[variable])
+    if platform.system() != "Windows":
+        roots.update(("/tmp", "/var/tmp", "/dev/shm"))
+    return tuple(os.path.normcase(os.path.abspath(root)).rstrip(os.sep) + os.sep for root in roots)
+
+
+# Function: Scan priority of a file - risky extension, recent modification and user-writable location
+def _file_priority(entry, now, writable_roots):
+    priority = 0
+    if os.path.splitext(entry.name)[1].lower() in RISKY_EXTENSIONS:
+        priority += 4
+    try:
+        if now - entry.stat().st_mtime <= PRIORITY_RECENT_DAYS * 86400:
+            priority += 2
+    except OSError:
+        pass
+    if os.path.normcase(entry.path).startswith(writable_roots):
+        priority += 1
+    return priority
+
+
+# Function: Walk a directory tree in a single pass with os.scandir
+def walk_files(directory, skip_dirs=None, on_enter=None, on_listed=None, prune_dir=None):
+    """Yield (DirEntry, fraction) for every file under directory.
+
+    fraction is an estimate of how much of the tree has been walked so far: each
+    directory's share is split evenly between its subdirectories, and a share is
+    counted as done once a directory with no subdirectories has been listed.
+
+    Subtrees whose path is in skip_dirs, or whose DirEntry prune_dir() returns
+    True for, are not entered. on_enter(path, parent) is
+    called before a directory's files are yielded and on_listed(path, subdir_count)
+    once its listing is finished.
+    """
+    skip_dirs = skip_dirs or ()
+    fraction_done = 0.0
+    if directory in skip_dirs:
+        return
+    stack = [(directory, 1.0, None)]
+    while stack:
+        path, share, parent = stack.pop()
+        if on_enter:
+            on_enter(path, parent)
+        subdirs = []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir():
+                            # Like os.walk, symlinked directories are not followed - and they are not files
+                            if entry.is_symlink():
+                                continue
+                            # Pruned subtrees are never listed
+                            if prune_dir and prune_dir(entry):
+                                continue
+                            subdirs.append(entry.path)
+                            continue
+                    except OSError:
+                        pass
+                    yield entry, fraction_done
+        except OSError:
+            # Unreadable directories are skipped, matching os.walk's default
+            pass
+
+        if subdirs:
+            child_share = share / len(subdirs)
+            pushed = 0
+            for subdir in reversed(subdirs):
+                if subdir in skip_dirs:
+                    fraction_done += child_share
+                    continue
+                stack.append((subdir, child_share, path))
+                pushed += 1
+            if on_listed:
+                on_listed(path, pushed)
+        else:
+            fraction_done += share
+            if on_listed:
+                on_listed(path, 0)
+
+
+# Function: Build the finding for a file (or archive member) from its digests and pattern matches
+def _build_finding(file_path, size, digests, signature_index, pattern_matches):
+    algorithm, signature = signature_index.match(digests)
+    if signature:
+        finding = {
+            "file": file_path,
+            "malware": signature["name"],
+            "hash": digests[algorithm],
+            "hash_algorithm": algorithm,
+            "size": size
+        }
+        if pattern_matches:
+            finding["pattern_ids"] = [match["id"] for match in pattern_matches]
+        return finding
+    if pattern_matches:
+        # Report the first pattern in the file, listing any others alongside it
+        first = pattern_matches[0]
+        return {
+            "file": file_path,
+            "malware": first["name"],
+            "hash": None,
+            "hash_algorithm": None,
+            "size": size,
+            "match_type": "pattern",
+            "pattern_id": first["id"],
+            "pattern_offset": first["offset"],
+            "pattern_ids": [match["id"] for match in pattern_matches]
+        }
+    return None
+
+
+# Archive containers whose members are inspected, and the limits applied per top-level archive
+ARCHIVE_EXTENSIONS = ('.zip', '.jar')
+ARCHIVE_MAX_DEPTH = 3
+ARCHIVE_MAX_MEMBERS = 10000
+ARCHIVE_MAX_EXPANDED_BYTES = 512 * 1024 * 1024
+# Nested archives are opened from memory, so their size is capped separately
+ARCHIVE_MAX_NESTED_SIZE = 64 * 1024 * 1024
+
+
+# Function: Hash and pattern-scan the members of a .zip/.jar straight from the archive stream
+def scan_archive(archive_path, signature_index, pattern_matcher=None, buffer=None, throttle=None):
+    """Return (findings, complete) for the members of an archive, nested archives included.
+
+    Nothing is extracted to disk. complete is False when the depth, member count or
+    expanded-bytes limit stopped part of the archive from being inspected, or when a header
+    or member could not be read (corrupt, encrypted or unsupported). Each finding
+    has the archive as "file" and the member as "archive_member", with nested archive
+    levels joined by "!/".
+    """
+    if buffer is None:
+        buffer = bytearray(HASH_CHUNK_SIZE)
+    budget = {"members": ARCHIVE_MAX_MEMBERS, "bytes": ARCHIVE_MAX_EXPANDED_BYTES, "complete": True}
+    findings = []
+    try:
+        with zipfile.ZipFile(archive_path) as archive:
+            _scan_archive_members(archive, archive_path, [], 1, signature_index, pattern_matcher, buffer,
+                                  budget, findings, throttle)
+    except Exception:
+        # zipfile raises more than BadZipFile on crafted headers (NotImplementedError,
+        # UnicodeDecodeError, ...); keep whatever was found before the failure
+        budget["complete"] = False
+    return findings, budget["complete"]
+
+
+def _scan_archive_members(archive, archive_path, parents, depth, signature_index, pattern_matcher, buffer,
+                          budget, findings, throttle=None):
+    for info in archive.infolist():
+        if info.is_dir():
+            continue
+        if budget["members"] <= 0:
+            budget["complete"] = False
+            return
+        # file_size is what the member decompresses to - zipfile never returns more - so a bomb
+        # is refused before any of it is inflated
+        if info.file_size > budget["bytes"]:
+            budget["complete"] = False
+            continue
+        budget["members"] -= 1
+
+        member_path = parents + [info.filename]
+        nested = os.path.splitext(info.filename)[1].lower() in ARCHIVE_EXTENSIONS
+        if nested and (depth >= ARCHIVE_MAX_DEPTH or info.file_size > ARCHIVE_MAX_NESTED_SIZE):
+            budget["complete"] = False
+            nested = False
+        algorithms = signature_index.algorithms if signature_index.size_may_match(info.file_size) else ()
+        if not (algorithms or pattern_matcher or nested):
+            continue
+
+        budget["bytes"] -= info.file_size
+        pattern_stream = pattern_matcher.stream() if pattern_matcher else None
+        data = None
+        try:
+            with archive.open(info) as member:
+                if nested:
+                    data = member.read()
+                    if throttle:
+                        throttle.on_read(len(data))
+                    digests = {algorithm: hashlib.new(algorithm, data).hexdigest() for algorithm in algorithms}
+                    if pattern_stream:
+                        pattern_stream.feed(data)
+                else:
+                    digests = _hash_stream(member, buffer, algorithms, pattern_stream, throttle)
+        except Exception:
+            # Encrypted, corrupt or unsupported members are skipped, and the archive counts as not fully inspected
+            budget["complete"] = False
+            continue
+
+        finding = _build_finding(archive_path, info.file_size, digests, signature_index,
+                                 pattern_stream.results() if pattern_stream else [])
+        if finding:
+            finding["archive_member"] = "!/".join(member_path)
+            findings.append(finding)
+
+        if nested:
+            try:
+                with zipfile.ZipFile(io.BytesIO(data)) as inner:
+                    _scan_archive_members(inner, archive_path, member_path, depth + 1, signature_index,
+                                          pattern_matcher, buffer, budget, findings, throttle)
+            except Exception:
+                budget["complete"] = False
+
+
+# Function: Check a single file against the known signatures
+def _check_file(entry, signature_index, hash_cache, hash_buffer, max_file_size,
+                mmap_threshold=MMAP_HASH_THRESHOLD, pattern_matcher=None, scan_archives=False, throttle=None):
+    """Return (status, findings) where status is 'scanned', 'size_excluded', 'triage_excluded',
+    'archive_limited', 'oversized' or 'error'
+
+    With a pattern_matcher every file is read for byte patterns, so the size and triage
+    checks only decide whether the digests are computed along the way. With scan_archives
+    the members of .zip/.jar files are checked too, and each infected member is its own finding.
+    A ScanThrottle passed as throttle paces the file and every read made for it.
+    """
+    try:
+        if throttle:
+            throttle.before_file()
+        # DirEntry caches its stat result, so each file is stat-ed at most once
+        st = entry.stat()
+
+        # Optional size policy - hashing is streamed so this is not needed to bound memory
+        if max_file_size is not None and st.st_size > max_file_size:
+            return "oversized", []
+
+        status, finding = _match_file(entry, st, signature_index, hash_cache, hash_buffer, mmap_threshold,
+                                      pattern_matcher, throttle)
+        findings = [finding] if finding else []
+        if scan_archives and os.path.splitext(entry.name)[1].lower() in ARCHIVE_EXTENSIONS:
+            archive_findings, complete = _check_archive(entry, st, signature_index, hash_cache, hash_buffer,
+                                                        pattern_matcher, throttle)
+            findings.extend(archive_findings)
+            if not complete:
+                status = "archive_limited"
+        return status, findings
+    except Exception:
+        return "error", []
+
+
+# Function: Member findings of an archive, reused from the hash cache while the archive and signatures are unchanged
+def _check_archive(entry, st, signature_index, hash_cache, hash_buffer, pattern_matcher, throttle=None):
+    """Return (findings, complete) like scan_archive"""
+    # Member results depend on the signatures and patterns they were checked against
+    fingerprint = f"{signature_index.fingerprint}:{pattern_matcher.fingerprint if pattern_matcher else ''}"
+    file_id = None
+    if hash_cache:
+        file_id = st.st_ino or entry.inode()
+        cached = hash_cache.cached_result(entry.path, st, "archive", file_id)
+        if cached and cached.get("fingerprint") == fingerprint:
+            return [dict(finding) for finding in cached["findings"]], cached["complete"]
+
+    # An archive that can't be read never costs the container's own finding
+    try:
+        findings, complete = scan_archive(entry.path, signature_index, pattern_matcher, hash_buffer, throttle)
+    except Exception:
+        return [], False
+    if hash_cache:
+        # One result per archive, replaced when the signatures change
+        hash_cache.store(entry.path, st, {"archive": {"fingerprint": fingerprint, "findings": findings,
+                                                     "complete": complete}}, file_id)
+    return [dict(finding) for finding in findings], complete
+
+
+# Function: Match a file's own contents against the signatures and byte patterns
+def _match_file(entry, st, signature_index, hash_cache, hash_buffer, mmap_threshold, pattern_matcher,
+                throttle=None):
+    """Return (status, finding or None) for the file itself"""
+    file_path = entry.path
+
+    # Whole-file signatures can only match a file whose size equals a known sample
+    algorithms = signature_index.algorithms
+    if not signature_index.size_may_match(st.st_size):
+        if pattern_matcher is None:
+            return "size_excluded", None
+        algorithms = ()
+
+    # Pattern results are cached next to the digests, keyed by the pattern set they came from
+    pattern_key = f"patterns:{pattern_matcher.fingerprint}" if pattern_matcher else None
+    wanted = algorithms + (pattern_key,) if pattern_key else algorithms
+
+    # Reuse the cached digests when the file is unchanged since the last scan.
+    # DirEntry.stat() leaves st_ino as 0 on Windows, so ask the entry for the file ID.
+    file_id = None
+    digests = None
+    if hash_cache:
+        file_id = st.st_ino or entry.inode()
+        digests = hash_cache.lookup(file_path, st, file_id, wanted)
+    if digests is None:
+        # Two-stage triage: one small read decides whether the full digest is worth computing
+        if algorithms and signature_index.needs_triage(st.st_size):
+            prefix_md5 = hash_file_prefix(file_path, hash_buffer, throttle)
+            if not signature_index.prefix_may_match(st.st_size, prefix_md5):
+                if pattern_matcher is None:
+                    return "triage_excluded", None
+                algorithms = ()
+        pattern_stream = pattern_matcher.stream() if pattern_matcher else None
+        digests = hash_file(file_path, hash_buffer, algorithms, mmap_threshold, st.st_size, pattern_stream,
+                            throttle)
+        if pattern_stream:
+            digests[pattern_key] = {"matches": pattern_stream.results()}
+        if hash_cache:
+            hash_cache.store(file_path, st, digests, file_id)
+
+    pattern_matches = digests[pattern_key]["matches"] if pattern_key else []
+    return "scanned", _build_finding(file_path, st.st_size, digests, signature_index, pattern_matches)
+
+
+# Checkpoint journal settings
+SCAN_JOURNAL_DIR = os.path.join(os.path.expanduser("~"), ".security_scanner", "journals")
+SCAN_JOURNAL_BATCH_RECORDS = 256
+SCAN_JOURNAL_FLUSH_SECONDS = 5
+
+
+# Function: Default checkpoint journal location for a scan root
+def get_scan_journal_path(directory):
+    key = hashlib.md5(os.path.normcase(os.path.abspath(directory)).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(SCAN_JOURNAL_DIR, f"{key}.jsonl")
+
+
+class ScanJournal:
+    """Append-only checkpoint journal of completed subtrees and findings for one scan root.
+
+    Records are buffered and written in batches, so checkpointing costs one write
+    and fsync every SCAN_JOURNAL_BATCH_RECORDS records or SCAN_JOURNAL_FLUSH_SECONDS.
+    """
+
+    def __init__(self, path, batch_records=SCAN_JOURNAL_BATCH_RECORDS, flush_seconds=SCAN_JOURNAL_FLUSH_SECONDS):
+        self.path = path
+        self.batch_records = batch_records
+        self.flush_seconds = flush_seconds
+        self._pending = []
+        self._last_flush = time.time()
+        self._file = None
+
+    def open(self, directory, resume=False):
+        journal_dir = os.path.dirname(self.path)
+        if journal_dir:
+            os.makedirs(journal_dir, exist_ok=True)
+        self._file = open(self.path, 'a' if resume else 'w', encoding="utf-8")
+        # A resume marker tells load which findings the resumed run will write again
+        self.record({"type": "resume" if resume else "start", "directory": directory, "time": int(time.time())})
+        self.flush()
+        return self
+
+    def record(self, record):
+        self._pending.append(json.dumps(record))
+        if len(self._pending) >= self.batch_records or time.time() - self._last_flush >= self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        if self._pending and self._file:
+            self._file.write("\n".join(self._pending) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._pending = []
+        self._last_flush = time.time()
+
+    def close(self, completed=False):
+        """Flush and close; a completed scan's journal is removed since there is nothing to resume"""
+        if not self._file:
+            return
+        self.flush()
+        self._file.close()
+        self._file = None
+        if completed:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+    @staticmethod
+    def load(path):
+        """Read a journal back into resume state, or None if there is no usable journal"""
+        directory = None
+        completed_dirs = set()
+        counts = {}
+        findings = []
+        try:
+            with open(path, 'r', encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # A torn last line from a crash mid-write
+                        continue
+                    if record.get("type") == "start":
+                        directory = record.get("directory")
+                    elif record.get("type") == "resume":
+                        # Subtrees unfinished at this point were rescanned from scratch, findings included
+                        findings = [r for r in findings if r.get("dir") in completed_dirs]
+                    elif record.get("type") == "dir":
+                        completed_dirs.add(record["path"])
+                        for status, count in record.get("counts", {}).items():
+                            counts[status] = counts.get(status, 0) + count
+                    elif record.get("type") == "finding":
+                        findings.append(record)
+        except OSError:
+            return None
+        if directory is None:
+            return None
+
+        # Findings from subtrees that did not finish will be found again when they are rescanned;
+        # one per file (or archive member) also covers journals written before resume markers
+        unique = {}
+        for r in findings:
+            if r.get("dir") in completed_dirs:
+                unique[(r["finding"].get("file"), r["finding"].get("archive_member"))] = (r["index"], r["finding"])
+        return {
+            "directory": directory,
+            "completed_dirs": completed_dirs,
+            "counts": counts,
+            "findings": list(unique.values())
+        }
+
+
+class _SubtreeTracker:
+    """Counts outstanding files per directory to tell when a whole subtree has been scanned"""
+
+    def __init__(self, on_complete):
+        self.nodes = {}
+        self.on_complete = on_complete
+
+    def enter(self, path, parent):
+        self.nodes[path] = {"parent": parent, "files": 0, "children": None, "counts": {}}
+
+    def listed(self, path, child_count):
+        self.nodes[path]["children"] = child_count
+        self._check(path)
+
+    def file_started(self, path):
+        self.nodes[path]["files"] += 1
+
+    def file_done(self, path, status):
+        node = self.nodes[path]
+        node["files"] -= 1
+        node["counts"][status] = node["counts"].get(status, 0) + 1
+        self._check(path)
+
+    def _check(self, path):
+        # A directory is done once it is fully listed, its files are scanned and its subdirectories are done
+        while path in self.nodes:
+            node = self.nodes[path]
+            if node["children"] is None or node["files"] or node["children"]:
+                return
+            del self.nodes[path]
+            self.on_complete(path, node["counts"])
+            path = node["parent"]
+            if path in self.nodes:
+                self.nodes[path]["children"] -= 1
+
+
+# Function: Identify the physical file behind a directory entry for hardlink deduplication
+def _physical_file_key(entry):
+    """Return ((device, inode), size) for files that may be reachable by other paths, else (None, size).
+
+    DirEntry.stat() on Windows leaves the file ID and link count unset, and fetching them
+    costs a second stat per file. There only symlinks pay it: links to the same target are
+    hashed once, but hardlinks and the target reached by its own path are hashed separately.
+    """
+    try:
+        st = entry.stat()
+        if not st.st_ino:
+            if not entry.is_symlink():
+                return None, st.st_size
+            st = os.stat(entry.path)
+        # Only hardlinked files and symlinks are tracked, which keeps the table small
+        if st.st_nlink > 1 or entry.is_symlink():
+            return (st.st_dev, st.st_ino), st.st_size
+        return None, st.st_size
+    except OSError:
+        return None, 0
+
+
+# Function: Hash worker thread for parallel scans
+def _hash_worker(work_queue, result_queue, signature_context, hash_cache, max_file_size, mmap_threshold,
+                 scan_archives=False, throttle=None):
+    # Each worker owns its read buffer; hashlib releases the GIL while digesting large chunks
+    hash_buffer = bytearray(HASH_CHUNK_SIZE)
+    while True:
+        item = work_queue.get()
+        if item is None:
+            break
+        index, entry, dir_path, link_key = item
+        with signature_context() as (signature_index, pattern_matcher):
+            status, findings = _check_file(entry, signature_index, hash_cache, hash_buffer, max_file_size,
+                                           mmap_threshold, pattern_matcher, scan_archives, throttle)
+        result_queue.put((index, status, findings, dir_path, link_key))
+
+
+# Function: Stream malware scan findings and progress events as they happen
+def iter_scan_files(directory, hash_cache=None, use_hash_cache=True,
+                    max_file_size=MAX_SCAN_FILE_SIZE, workers=1, mmap_threshold=MMAP_HASH_THRESHOLD,
+                    journal_path=None, resume=False, rules=None, dedupe_links=True, patterns=None,
+                    archives=True, signature_db=None, priority=False, deadline=None, time_budget=None,
+                    low_impact=False, max_bytes_per_second=None, max_files_per_second=None):
+    """Scan directory and yield event dicts as the scan runs.
+
+    "finding"  - {"index": walk position, "finding": {...}} as soon as an infected file is found
+    "progress" - {"progress": percent, "scanned": files done, "total": estimated total} every 50 files
+    "complete" - {"stats": {...}} once the scan has finished or run out of time
+
+    Findings are handed to the consumer and not kept here, so memory stays bounded.
+
+    With journal_path, completed subtrees and findings are checkpointed to that journal.
+    With resume=True an existing journal is continued: its findings are replayed and
+    its completed subtrees are not walked again.
+
+    rules is a ScanRules object (or a path to a rules config) that prunes directories
+    and filters files before they are hashed.
+
+    With dedupe_links, each physical file (device, inode) is hashed once; other hardlinks
+    and symlinks to it reuse the result and are still reported individually. On Windows
+    only symlinks are deduplicated, so each file is still stat-ed once (see _physical_file_key).
+
+    patterns enables byte-pattern matching on the same read as hashing: True for the
+    built-in patterns, a list of pattern records, or a compiled PatternMatcher.
+
+    With archives, members of .zip/.jar files are hashed and pattern-scanned from the
+    archive stream within the ARCHIVE_* limits; infected members are reported with
+    "archive_member" set.
+
+    signature_db is a SignatureDB (or a path to one) searched in addition to the
+    built-in signatures.
+
+    With priority, files are scanned in order of risk: RISKY_EXTENSIONS, then files
+    modified in the last PRIORITY_RECENT_DAYS, then files under user-writable locations.
+    Up to PRIORITY_BUFFER_FILES walked files wait to be ordered; on a larger tree the
+    highest-priority file waiting is scanned for each further file walked, so memory
+    stays bounded and scanning starts before the walk ends. deadline (a time.time()
+    value) or time_budget (seconds) stops starting new files, and walking, once
+    reached; stats then has "complete" False and the journal is kept so the rest can
+    be resumed.
+
+    max_bytes_per_second and max_files_per_second rate limit the scan. low_impact
+    additionally lowers the process's CPU and I/O priority, backs off while read
+    latency is above normal, and applies the LOW_IMPACT_* rates unless given others.
+    """
+    # A database given by path is opened for this scan and closed when it ends
+    owns_db = isinstance(signature_db, str)
+    if owns_db:
+        signature_db = SignatureDB(signature_db)
+    signature_store = get_signature_store()
+    signature_reloads_before = signature_store.reloads
+    # patterns=True follows the signature store, so its patterns are hot-reloaded with the hashes
+    fixed_matcher = None if patterns is True else get_pattern_matcher(patterns)
+
+    # (snapshot, index) over signature_db, rebuilt when the signature version changes; never cached
+    # in the store, so it goes away with the database when the scan ends
+    scan_index = (None, None)
+
+    @contextmanager
+    def signature_context():
+        """Hold (signature_index, pattern_matcher) for the signature version now in effect"""
+        nonlocal scan_index
+        with signature_store.acquire() as snapshot:
+            matcher = signature_store.matcher(snapshot) if patterns is True else fixed_matcher
+            if signature_db is None:
+                yield signature_store.index(snapshot=snapshot), matcher
+                return
+            indexed_snapshot, index = scan_index
+            if indexed_snapshot is not snapshot:
+                # Workers racing here may each build one; the last assignment wins
+                index = signature_store.index(signature_db, snapshot)
+                scan_index = (snapshot, index)
+            yield index, matcher
+
+    status_counts = {"scanned": 0, "size_excluded": 0, "triage_excluded": 0, "archive_limited": 0, "oversized": 0,
+                     "error": 0}
+    rule_excluded_files = 0
+    deduplicated_files = 0
+    deduplicated_bytes = 0
+    # (device, inode) -> result of the first path, or a list of paths waiting on it
+    linked_files = {}
+    if isinstance(rules, str):
+        rules = load_scan_rules(rules)
+
+    priority_adjustments = []
+    if low_impact:
+        priority_adjustments = lower_process_priority()
+        max_bytes_per_second = max_bytes_per_second or LOW_IMPACT_BYTES_PER_SECOND
+        max_files_per_second = max_files_per_second or LOW_IMPACT_FILES_PER_SECOND
+    # Always present so effective throughput is measured; it only slows the scan when limits are set
+    throttle = ScanThrottle(max_bytes_per_second, max_files_per_second, adaptive=low_impact)
+
+    scanned_files = 0
+    completed_files = 0
+    start_time = time.time()
+
+    # Pick up where an interrupted scan of this directory left off
+    resume_state = ScanJournal.load(journal_path) if journal_path and resume else None
+    if resume_state and resume_state["directory"] != directory:
+        resume_state = None
+    completed_dirs = set()
+    resumed_findings = []
+    if resume_state:
+        completed_dirs = resume_state["completed_dirs"]
+        resumed_findings = resume_state["findings"]
+        for status, count in resume_state["counts"].items():
+            status_counts[status] = status_counts.get(status, 0) + count
+        scanned_files = completed_files = sum(resume_state["counts"].values())
+    resumed_files = scanned_files
+
+    journal = None
+    tracker = None
+    if journal_path:
+        journal = ScanJournal(journal_path).open(directory, resume=resume_state is not None)
+
+        def checkpoint_subtree(path, counts):
+            journal.record({"type": "dir", "path": path, "counts": counts})
+
+        tracker = _SubtreeTracker(checkpoint_subtree)
+
+    # Use the caller's cache if given, otherwise manage our own
+    owns_cache = hash_cache is None and use_hash_cache
+    if owns_cache:
+        hash_cache = HashCache().load()
+    elif not use_hash_cache:
+        hash_cache = None
+    cache_hits_before = hash_cache.hits if hash_cache else 0
+    cache_misses_before = hash_cache.misses if hash_cache else 0
+
+    if resume_state:
+        print(f"{Fore.CYAN}[*] Resuming scan of {directory} after {resumed_files} files{Style.RESET_ALL}")
+    else:
+        print(f"{Fore.CYAN}[*] Scanning directory: {directory}{Style.RESET_ALL}")
+
+    for index, finding in resumed_findings:
+        yield {"event": "finding", "index": index, "finding": finding}
+
+    # Progress is reported against a running estimate of the total, so no separate count pass is needed
+    walk_fraction = 0.0
+    current_dir = None
+
+    def enter_dir(path, parent):
+        nonlocal current_dir
+        current_dir = path
+        if tracker:
+            tracker.enter(path, parent)
+
+    def estimated_total():
+        if known_total is not None:
+            return known_total
+        if walk_fraction > 0:
+            return max(int(scanned_files / walk_fraction), scanned_files)
+        return scanned_files
+
+    def handle_duplicate(index, path, dir_path, size, status, findings):
+        nonlocal deduplicated_files, deduplicated_bytes
+        deduplicated_files += 1
+        deduplicated_bytes += size
+        findings = [dict(finding, file=path, hardlink_of=finding["file"]) for finding in findings]
+        return handle_result(index, status, findings, dir_path)
+
+    def handle_result(index, status, findings, dir_path, link_key=None):
+        nonlocal completed_files
+        events = []
+        if link_key is not None:
+            # Resolve other paths to this physical file that arrived while it was hashing
+            waiting = linked_files[link_key]
+            linked_files[link_key] = (status, findings)
+            for waiter in waiting:
+                events.extend(handle_duplicate(*waiter, status, findings))
+
+        completed_files += 1
+        status_counts[status] += 1
+        for finding in findings:
+            location = finding["file"]
+            if finding.get("archive_member"):
+                location += f" -> {finding['archive_member']}"
+            print(f"{Fore.RED}[!] Found infected file: {location} - {finding['malware']}{Style.RESET_ALL}")
+            events.append({"event": "finding", "index": index, "finding": finding})
+            if journal:
+                journal.record({"type": "finding", "index": index, "finding": finding, "dir": dir_path})
+        if tracker:
+            tracker.file_done(dir_path, status)
+
+        if completed_files % 50 == 0:  # Update progress every 50 files
+            total_files = estimated_total()
+            events.append({
+                "event": "progress",
+                "progress": int((completed_files / total_files) * 100),
+                "scanned": completed_files,
+                "total": total_files
+            })
+        return events
+
+    def dedupe(index, entry, dir_path):
+        """Return (link_key, events); events is None when the entry still needs hashing"""
+        if not dedupe_links:
+            return None, None
+        link_key, size = _physical_file_key(entry)
+        if link_key is None:
+            return None, None
+        primary = linked_files.get(link_key)
+        if primary is None:
+            linked_files[link_key] = []
+            return link_key, None
+        if isinstance(primary, list):
+            primary.append((index, entry.path, dir_path, size))
+            return link_key, []
+        return link_key, handle_duplicate(index, entry.path, dir_path, size, *primary)
+
+    def rule_filtered(entries):
+        nonlocal rule_excluded_files
+        for entry, fraction in entries:
+            try:
+                allowed = rules.allows_file(entry, directory)
+            except OSError:
+                allowed = True  # Let the scan record the error
+            if allowed:
+                yield entry, fraction
+            else:
+                rule_excluded_files += 1
+
+    walker = walk_files(directory, skip_dirs=completed_dirs, on_enter=enter_dir,
+                        on_listed=tracker.listed if tracker else None,
+                        prune_dir=(lambda entry: rules.prunes_dir(entry, directory)) if rules else None)
+    if rules:
+        walker = rule_filtered(walker)
+
+    def walk_items():
+        """Yield (index, entry, dir_path, fraction) in walk order"""
+        index = resumed_files
+        for entry, fraction in walker:
+            index += 1
+            # Counted against its directory as soon as it is walked, so a subtree is only
+            # checkpointed once every file in it has been scanned, whatever the scan order
+            if tracker:
+                tracker.file_started(current_dir)
+            yield index, entry, current_dir, fraction
+
+    def prioritized(items):
+        """Yield the items highest priority first (walk order within a priority), holding back
+        at most PRIORITY_BUFFER_FILES of them"""
+        nonlocal known_total, timed_out
+        now = time.time()
+        waiting = []
+        walked = 0
+        fraction = 0.0
+        for index, entry, dir_path, fraction in items:
+            if deadline is not None and time.time() >= deadline:
+                # Nothing more will be started, so don't spend the rest of the budget walking
+                timed_out = True
+                return
+            walked += 1
+            item = (-_file_priority(entry, now, writable_roots), index, entry, dir_path)
+            if len(waiting) < PRIORITY_BUFFER_FILES:
+                heapq.heappush(waiting, item)
                 continue
+            _, index, entry, dir_path = heapq.heappushpop(waiting, item)
+            yield index, entry, dir_path, fraction
+        known_total = resumed_files + walked
+        while waiting:
+            _, index, entry, dir_path = heapq.heappop(waiting)
+            yield index, entry, dir_path, 1.0
+
+    known_total = None
+    work = walk_items()
+    if priority:
+        writable_roots = get_user_writable_roots()
+        work = prioritized(work)
+
+    # Absolute time after which no new files are started
+    if time_budget is not None:
+        budget_deadline = start_time + time_budget
+        deadline = budget_deadline if deadline is None else min(deadline, budget_deadline)
+    timed_out = False
+
+    finished = False
+    try:
+        if workers <= 1:
+            # Serial mode - one read buffer reused for every file in this scan
+            hash_buffer = bytearray(HASH_CHUNK_SIZE)
+            for index, entry, dir_path, walk_fraction in work:
+                if deadline is not None and time.time() >= deadline:
+                    timed_out = True
+                    break
+                scanned_files += 1
+                link_key, events = dedupe(index, entry, dir_path)
+                if events is not None:
+                    yield from events
+                    continue
+                with signature_context() as (signature_index, pattern_matcher):
+                    status, findings = _check_file(entry, signature_index, hash_cache, hash_buffer, max_file_size,
+                                                   mmap_threshold, pattern_matcher, archives, throttle)
+                yield from handle_result(index, status, findings, dir_path, link_key)
+        else:
+            # Parallel mode - the walk feeds a bounded work queue and results are handled on this thread
+            work_queue = queue.Queue(maxsize=workers * 64)
+            result_queue = queue.Queue()
+            threads = [
+                threading.Thread(target=_hash_worker,
+                                 args=(work_queue, result_queue, signature_context, hash_cache, max_file_size,
+                                       mmap_threshold, archives, throttle),
+                                 daemon=True)
+                for _ in range(workers)
+            ]
+            for thread in threads:
+                thread.start()
+
+            walked = False
+            try:
+                for index, entry, dir_path, walk_fraction in work:
+                    if deadline is not None and time.time() >= deadline:
+                        timed_out = True
+                        break
+                    scanned_files += 1
+                    link_key, events = dedupe(index, entry, dir_path)
+                    if events is not None:
+                        yield from events
+                        continue
+                    while True:
+                        # Handle finished files on this thread so events come from the consumer's thread
+                        while not result_queue.empty():
+                            yield from handle_result(*result_queue.get_nowait())
+                        try:
+                            work_queue.put((index, entry, dir_path, link_key), timeout=0.05)
+                            break
+                        except queue.Full:
+                            continue
+                walked = True
+            finally:
+                if not walked or timed_out:
+                    # Consumer stopped early or time ran out - drop queued work so the workers exit promptly
+                    while True:
+                        try:
+                            _, _, _, link_key = work_queue.get_nowait()
+                        except queue.Empty:
+                            break
+                        # Paths waiting on a dropped file will not be scanned either
+                        waiting = linked_files.pop(link_key, ()) if link_key is not None else ()
+                        scanned_files -= 1 + len(waiting)
+                for _ in threads:
+                    work_queue.put(None)
+                if not walked:
+                    # Workers finish the file in hand first; it may still be reading the signature database
+                    for thread in threads:
+                        thread.join()
+
+            while completed_files < scanned_files:
+                yield from handle_result(*result_queue.get())
+            for thread in threads:
+                thread.join()
+        finished = not timed_out
+    finally:
+        # An interrupted scan keeps its journal so it can be resumed
+        if journal:
+            journal.close(completed=finished)
+        if owns_db:
+            signature_db.close()
+
+    # The number left is only known when the whole tree was walked up front (priority mode)
+    unscanned_files = 0
+    if timed_out:
+        unscanned_files = known_total - completed_files if known_total is not None else None
+        print(f"{Fore.YELLOW}[!] Time budget reached - returning partial results"
+              f"{f' ({unscanned_files} files not scanned)' if unscanned_files is not None else ''}{Style.RESET_ALL}")
+        if known_total:
+            yield {"event": "progress", "progress": int(completed_files / known_total * 100),
+                   "scanned": completed_files, "total": known_total}
+    elif completed_files:
+        yield {"event": "progress", "progress": 100, "scanned": completed_files, "total": completed_files}
+
+    if hash_cache:
+        # Only evict after a complete walk, otherwise unvisited files would look deleted
+        if finished:
+            hash_cache.evict_stale(directory)
+        if owns_cache:
+            hash_cache.save()
 
     scan_duration = time.time() - start_time
+    pattern_matcher = signature_store.matcher() if patterns is True else fixed_matcher
 
-    return {
-        "infected_files": infected_files,
+    yield {
+        "event": "complete",
         "stats": {
             "scanned_files": scanned_files,
-            "skipped_files": skipped_files,
-            "scan_duration_seconds": round(scan_duration, 2)
+            "skipped_files": status_counts["oversized"] + status_counts["error"],
+            "oversized_files": status_counts["oversized"],
+            "size_excluded_files": status_counts["size_excluded"],
+            "triage_excluded_files": status_counts["triage_excluded"],
+            "archive_limited_files": status_counts["archive_limited"],
+            "rule_excluded_files": rule_excluded_files,
+            "deduplicated_files": deduplicated_files,
+            "deduplicated_bytes": deduplicated_bytes,
+            "resumed_files": resumed_files,
+            "pattern_count": len(pattern_matcher) if pattern_matcher else 0,
+            "signature_version": signature_store.current()["version"],
+            "signature_reloads": signature_store.reloads - signature_reloads_before,
+            "cache_hits": (hash_cache.hits - cache_hits_before) if hash_cache else 0,
+            "cache_misses": (hash_cache.misses - cache_misses_before) if hash_cache else 0,
+            "scan_duration_seconds": round(scan_duration, 2),
+            "bytes_read": throttle.bytes_read,
+            "throughput_bytes_per_second": int(throttle.bytes_read / scan_duration) if scan_duration > 0 else 0,
+            "throughput_files_per_second": round(throttle.files / scan_duration, 1) if scan_duration > 0 else 0,
+            # Summed over worker threads, so it can exceed the scan duration
+            "throttle_wait_seconds": round(throttle.wait_seconds, 2),
+            "backoff_seconds": round(throttle.backoff_seconds, 2),
+            "priority_adjustments": priority_adjustments,
+            "complete": not timed_out,
+            "unscanned_files": unscanned_files
         }
     }
 
 
-# Function: Scan Open Ports with service detection
-def scan_open_ports():
-    print(f"{Fore.CYAN}[*] Scanning for open ports...{Style.RESET_ALL}")
-    common_ports = {
-        20: "FTP-Data", 21: "FTP", 22: "SSH", 23: "Telnet", 25: "SMTP",
-        53: "DNS", 80: "HTTP", 110: "POP3", 135: "RPC", 139: "NetBIOS",
-        143: "IMAP", 443: "HTTPS", 445: "SMB", 993: "IMAPS", 995: "POP3S",
-        1433: "MSSQL", 3306: "MySQL", 3389: "RDP", 5900: "VNC", 8080: "HTTP-Alt"
+# Function: Scan Files for Malware Signatures (Enhanced)
+def scan_files(directory, callback=None, hash_cache=None, use_hash_cache=True,
+               max_file_size=MAX_SCAN_FILE_SIZE, workers=1, event_callback=None,
+               mmap_threshold=MMAP_HASH_THRESHOLD, journal_path=None, resume=False, rules=None,
+               dedupe_links=True, patterns=None, archives=True, signature_db=None, priority=False,
+               deadline=None, time_budget=None, low_impact=False, max_bytes_per_second=None,
+               max_files_per_second=None):
+    findings = []
+    stats = {}
+    for event in iter_scan_files(directory, hash_cache=hash_cache, use_hash_cache=use_hash_cache,
+                                 max_file_size=max_file_size, workers=workers,
+                                 mmap_threshold=mmap_threshold, journal_path=journal_path, resume=resume,
+                                 rules=rules, dedupe_links=dedupe_links, patterns=patterns,
+                                 archives=archives, signature_db=signature_db, priority=priority,
+                                 deadline=deadline, time_budget=time_budget, low_impact=low_impact,
+                                 max_bytes_per_second=max_bytes_per_second,
+                                 max_files_per_second=max_files_per_second):
+        if event_callback:
+            event_callback(event)
+        if event["event"] == "finding":
+            findings.append((event["index"], event["finding"]))
+        elif event["event"] == "progress":
+            if callback:
+                callback(event["progress"], event["scanned"], event["total"])
+        elif event["event"] == "complete":
+            stats = event["stats"]
+
+    # Report findings in walk order so serial and parallel output match
+    findings.sort(key=lambda item: item[0])
+
+    return {
+        "infected_files": [finding for _, finding in findings],
+        "stats": stats,
+        # False when a deadline or time budget cut the scan short
+        "complete": stats.get("complete", True)
     }
 
-    open_ports = []
-    for port in range(1, 1025):  # Scan common ports
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(0.5)
-        if sock.connect_ex(("127.0.0.1", port)) == 0:
-            service = common_ports.get(port, "Unknown")
-            open_ports.append({"port": port, "service": service})
-            print(f"{Fore.YELLOW}[+] Found open port: {port} ({service}){Style.RESET_ALL}")
-        sock.close()
-
-    # Additional scan for common high ports
-    high_ports = [1433, 3306, 3389, 5432, 5900, 8080, 8443]
-    for port in high_ports:
-        if port > 1024:  # Avoid duplicate scans
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(0.5)
-            if sock.connect_ex(("127.0.0.1", port)) == 0:
-                service = common_ports.get(port, "Unknown")
-                open_ports.append({"port": port, "service": service})
-                print(f"{Fore.YELLOW}[+] Found open port: {port} ({service}){Style.RESET_ALL}")
-            sock.close()
 
+# Function: Describe an open port entry, including its fingerprint when banners were grabbed
+def _describe_open_port(entry):
+    details = " ".join(value for value in (entry.get("product"), entry.get("version")) if value)
+    return f"{entry['service']}, {details}" if details else entry["service"]
+
+
+# Function: Open ports of this machine from the OS socket table, without connecting to any of them
+def _list_open_ports(ports=None, proc_root=None, udp=False):
+    print(f"{Fore.CYAN}[*] Reading listening sockets...{Style.RESET_ALL}")
+    wanted = set(parse_ports(ports)) if ports is not None else None
+    open_ports = []
+    for entry in group_open_ports(list_listening_sockets(proc_root=proc_root), ("tcp", "udp") if udp else ("tcp",)):
+        if wanted is not None and entry["port"] not in wanted:
+            continue
+        owner = f" - {entry['process'] or 'unknown process'} [{entry['pid']}]" if entry["pid"] is not None else ""
+        print(f"{Fore.YELLOW}[+] Found open port: {entry['port']}/{entry['protocol']} on "
+              f"{', '.join(entry['addresses'])} ({entry['service']}){owner}{Style.RESET_ALL}")
+        open_ports.append(entry)
     return open_ports
 
 
+# Function: Scan Open Ports with service detection
+def scan_open_ports(host="127.0.0.1", ports=None, concurrency=PORT_SCAN_CONCURRENCY, timeout=None,
+                    retries=PORT_SCAN_RETRIES, banners=False, banner_timeout=BANNER_TIMEOUT, method="connect",
+                    proc_root=None, udp=False):
+    """method="connect" probes host over TCP; method="socket_table" reads this machine's
+    listening sockets and their owning processes from the OS instead (host is ignored).
+    The socket table gives one entry per port, TCP only unless udp=True, so the result
+    lines up with a connect scan's"""
+    if method == "socket_table":
+        try:
+            return _list_open_ports(ports, proc_root, udp)
+        except (OSError, ValueError, subprocess.SubprocessError) as e:
+            print(f"{Fore.YELLOW}[!] Could not read the socket table ({str(e)}), probing ports instead{Style.RESET_ALL}")
+
+    print(f"{Fore.CYAN}[*] Scanning for open ports...{Style.RESET_ALL}")
+
+    def report(_, entry):
+        print(f"{Fore.YELLOW}[+] Found open port: {entry['port']} ({_describe_open_port(entry)}){Style.RESET_ALL}")
+
+    # Probe the ports concurrently; pass ports=range(1, 65536) for a full sweep
+    try:
+        result = asyncio.run(sweep_async([host], ports, concurrency, concurrency, timeout, retries, banners,
+                                         banner_timeout, on_open=report))[0]
+    except Exception as e:
+        print(f"{Fore.RED}[!] Error scanning ports: {str(e)}{Style.RESET_ALL}")
+        return []
+    if result.get("error"):
+        print(f"{Fore.RED}[!] Error scanning ports: {result['error']}{Style.RESET_ALL}")
+
+    return result["open_ports"]
+
+
+# Function: Sweep hosts and CIDR ranges for open ports, grouped per host for upload_network_scan_results
+def scan_network(targets, ports=None, concurrency=PORT_SCAN_CONCURRENCY, host_concurrency=PORT_SCAN_HOST_CONCURRENCY,
+                 timeout=None, retries=PORT_SCAN_RETRIES, banners=False, banner_timeout=BANNER_TIMEOUT):
+    """targets: hosts, addresses and CIDR ranges, e.g. "192.168.1.0/24, nas.local";
+    ports: a port expression such as "22,80,443,8000-8100" (default: the common ports);
+    timeout: None to time probes from each host's measured round-trip time, or fixed seconds;
+    banners: fingerprint each open port's service from its banner"""
+    print(f"{Fore.CYAN}[*] Sweeping {targets} for open ports...{Style.RESET_ALL}")
+    start_time = time.time()
+
+    def report(host, entry):
+        print(f"{Fore.YELLOW}[+] {host}: found open port {entry['port']} ({_describe_open_port(entry)}){Style.RESET_ALL}")
+
+    try:
+        hosts = asyncio.run(sweep_async(targets, ports, concurrency, host_concurrency, timeout, retries,
+                                        banners, banner_timeout, on_open=report))
+    except ValueError as e:
+        print(f"{Fore.RED}[!] Invalid network scan target: {str(e)}{Style.RESET_ALL}")
+        return {"error": str(e)}
+    except Exception as e:
+        print(f"{Fore.RED}[!] Error sweeping network: {str(e)}{Style.RESET_ALL}")
+        return {"error": str(e)}
+
+    # Hosts with nothing open are only counted, so a large range keeps the upload small
+    reported = [host for host in hosts if host["open_ports"] or host.get("error")]
+    return {
+        "targets": targets,
+        "ports": ports if isinstance(ports, str) or ports is None else sorted(set(ports)),
+        "hosts": reported,
+        "stats": {
+            "hosts_scanned": sum(1 for host in hosts if not host.get("error")),
+            "hosts_with_open_ports": sum(1 for host in hosts if host["open_ports"]),
+            "open_ports": sum(len(host["open_ports"]) for host in hosts),
+            "filtered_ports": sum(host["filtered_ports"] for host in hosts),
+            "retried_ports": sum(host["retried_ports"] for host in hosts),
+            "scan_duration_seconds": round(time.time() - start_time, 2)
+        }
+    }
+
 
 # Function: Scan Installed Software with vulnerability check
 def scan_installed_software():
@@ -395,37 +2248,135 @@ def update_progress(progress, scanned, total):
     sys.stdout.flush()
 
 
-# Function: Run Full System Scan
-def run_full_system_scan():
-    print(f"{Fore.GREEN}===== Starting Full System Scan ====={Style.RESET_ALL}")
-
-    # Get list of all drives
+# Function: List the drives scanned by a full system scan
+def get_scan_volumes():
     drives = []
     for drive in range(ord('A'), ord('Z') + 1):
         drive_letter = chr(drive) + ':\\'
         if os.path.exists(drive_letter):
             drives.append(drive_letter)
+    return drives
+
+
+# Function: Scan one volume inside a worker process of a parallel full system scan
+def _scan_volume_process(volume, use_hash_cache, event_queue, scan_options):
+    # Each process works on its own copy of the cache and hands its entries back to the parent
+    hash_cache = HashCache().load() if use_hash_cache else None
+    result = scan_files(volume, hash_cache=hash_cache, use_hash_cache=use_hash_cache,
+                        event_callback=lambda event: event_queue.put(dict(event, drive=volume)),
+                        **scan_options)
+    cache_entries = hash_cache.entries_under(volume) if hash_cache else None
+    return result, cache_entries
+
+
+# Function: Scan every volume at once, one worker process per volume
+def _run_parallel_volume_scan(drives, hash_cache, use_hash_cache, max_volume_processes, event_callback,
+                              drive_options):
+    drive_scans = {}
+    volume_progress = {}
+
+    def handle_event(event):
+        if event["event"] == "progress":
+            # Combine per-volume progress into one overall bar
+            volume_progress[event["drive"]] = (event["scanned"], event["total"])
+            scanned = sum(done for done, _ in volume_progress.values())
+            total = sum(total for _, total in volume_progress.values())
+            if total:
+                update_progress(int(scanned / total * 100), scanned, total)
+        if event_callback:
+            event_callback(event)
+
+    with multiprocessing.Manager() as manager:
+        event_queue = manager.Queue()
+        with ProcessPoolExecutor(max_workers=max_volume_processes or len(drives)) as pool:
+            futures = {}
+            for drive in drives:
+                print(f"\n{Fore.CYAN}[*] Starting scan on drive {drive}{Style.RESET_ALL}")
+                future = pool.submit(_scan_volume_process, drive, use_hash_cache, event_queue, drive_options(drive))
+                futures[future] = drive
+
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                while not event_queue.empty():
+                    handle_event(event_queue.get())
+                for future in done:
+                    drive = futures[future]
+                    try:
+                        result, cache_entries = future.result()
+                        drive_scans[drive] = result
+                        if hash_cache is not None and cache_entries is not None:
+                            hash_cache.replace_entries_under(drive, cache_entries)
+                    except Exception as e:
+                        drive_scans[drive] = {"error": str(e)}
+
+            while not event_queue.empty():
+                handle_event(event_queue.get())
+
+    # Keep drive_scans in drive order regardless of which volume finished first
+    return {drive: drive_scans[drive] for drive in drives}
+
+
+# Function: Run Full System Scan
+def run_full_system_scan(use_hash_cache=True, workers=1, event_callback=None, parallel_volumes=False,
+                         volume_workers=None, max_volume_processes=None, volumes=None,
+                         checkpoint=True, resume=False, **scan_options):
+    print(f"{Fore.GREEN}===== Starting Full System Scan ====={Style.RESET_ALL}")
+
+    # A time budget covers the whole scan, not each drive in turn
+    if scan_options.get("time_budget") is not None:
+        budget_deadline = time.time() + scan_options.pop("time_budget")
+        deadline = scan_options.get("deadline")
+        scan_options["deadline"] = budget_deadline if deadline is None else min(deadline, budget_deadline)
+
+    # Get list of all drives
+    drives = volumes if volumes is not None else get_scan_volumes()
 
     # Collect all scan results
     scan_results = {
         "drive_scans": {}
     }
 
-    # Scan each drive
-    for drive in drives:
-        print(f"\n{Fore.CYAN}[*] Starting scan on drive {drive}{Style.RESET_ALL}")
-        try:
-            # FIX: Pass update_progress as the callback parameter
-            result = scan_files(drive, update_progress)
-            scan_results["drive_scans"][drive] = result
-        except Exception as e:
-            scan_results["drive_scans"][drive] = {"error": str(e)}
+    # Share one hash cache across all drives and write it once at the end
+    hash_cache = HashCache().load() if use_hash_cache else None
+
+    def drive_options(drive):
+        options = dict(scan_options)
+        # Per-volume hash thread limits, e.g. 1 for a spinning disk and 8 for NVMe
+        options["workers"] = (volume_workers or {}).get(drive, workers)
+        # Each drive checkpoints to its own journal so drives resume independently
+        if checkpoint:
+            options["journal_path"] = get_scan_journal_path(drive)
+            options["resume"] = resume
+        return options
+
+    if parallel_volumes and len(drives) > 1:
+        scan_results["drive_scans"] = _run_parallel_volume_scan(
+            drives, hash_cache, use_hash_cache, max_volume_processes, event_callback, drive_options)
+    else:
+        # Scan each drive
+        for drive in drives:
+            print(f"\n{Fore.CYAN}[*] Starting scan on drive {drive}{Style.RESET_ALL}")
+            try:
+                drive_event_callback = None
+                if event_callback:
+                    drive_event_callback = lambda event, drive=drive: event_callback(dict(event, drive=drive))
+                # FIX: Pass update_progress as the callback parameter
+                result = scan_files(drive, update_progress, hash_cache=hash_cache, use_hash_cache=use_hash_cache,
+                                    event_callback=drive_event_callback, **drive_options(drive))
+                scan_results["drive_scans"][drive] = result
+            except Exception as e:
+                scan_results["drive_scans"][drive] = {"error": str(e)}
+
+    if hash_cache:
+        hash_cache.save()
 
     return scan_results
 
 
 # Function: Run scan on specific directory
-def run_directory_scan(directory):
+def run_directory_scan(directory, use_hash_cache=True, event_callback=None, checkpoint=True, resume=False,
+                       **scan_options):
     print(f"{Fore.GREEN}===== Starting Scan on {directory} ====={Style.RESET_ALL}")
 
     # Verify directory exists
@@ -433,13 +2384,36 @@ def run_directory_scan(directory):
         print(f"{Fore.RED}[!] Directory does not exist: {directory}{Style.RESET_ALL}")
         return None
 
+    hash_cache = HashCache().load() if use_hash_cache else None
+    journal_path = get_scan_journal_path(directory) if checkpoint else None
+
     # Collect all scan results
     scan_results = {
-        "directory_scan": scan_files(directory, update_progress)
+        "directory_scan": scan_files(directory, update_progress, hash_cache=hash_cache,
+                                     use_hash_cache=use_hash_cache, event_callback=event_callback,
+                                     journal_path=journal_path, resume=resume, **scan_options)
     }
 
+    if hash_cache:
+        hash_cache.save()
+
     return scan_results
 
+
+# Function: Check for an interrupted scan that can be resumed
+def has_resumable_scan(directory):
+    return os.path.exists(get_scan_journal_path(directory))
+
+
+# Function: Resume an interrupted directory scan from its last checkpoint
+def resume_directory_scan(directory, **scan_options):
+    return run_directory_scan(directory, resume=True, **scan_options)
+
+
+# Function: Resume an interrupted full system scan; drives that had finished are scanned afresh
+def resume_full_system_scan(**scan_options):
+    return run_full_system_scan(resume=True, **scan_options)
+
 # Function: Send Scan Data to Backend
 def upload_scan_results(scan_result, scan_type):
     headers = {}
@@ -585,7 +2559,7 @@ def quick_system_health_check():
         "system_info": get_system_info(),
         "defender_status": get_defender_status(),
         "firewall_status": check_firewall_status(),
-        "open_ports": scan_open_ports(),
+        "open_ports": scan_open_ports(method="socket_table"),
         "installed_software": scan_installed_software(),
     }
 
@@ -684,7 +2658,10 @@ def main():
             directory = input(f"\n{Fore.GREEN}Enter directory to scan (e.g., C:\\Users): {Style.RESET_ALL}")
 
             if os.path.exists(directory):
-                results = run_directory_scan(directory)
+                resume = False
+                if has_resumable_scan(directory):
+                    resume = input(f"{Fore.GREEN}Resume the interrupted scan of this directory? (y/n): {Style.RESET_ALL}").lower() == 'y'
+                results = run_directory_scan(directory, resume=resume)
                 print(f"\n{Fore.GREEN}[✓] Directory scan completed!{Style.RESET_ALL}")
 
                 # Display infection summary
@@ -695,6 +2672,8 @@ def main():
                 print(f"\n{Fore.CYAN}=== Scan Summary ==={Style.RESET_ALL}")
                 print(f"Scanned Files: {stats['scanned_files']}")
                 print(f"Skipped Files: {stats['skipped_files']}")
+                print(f"Hash Cache Hits/Misses: {stats['cache_hits']}/{stats['cache_misses']}")
+                print(f"Signature Version: {stats['signature_version']}")
                 print(f"Scan Duration: {stats['scan_duration_seconds']} seconds")
 
                 if infected:
@@ -718,7 +2697,10 @@ def main():
             # Full System Scan
             print(f"{Fore.YELLOW}[!] Warning: Full system scan may take a long time.{Style.RESET_ALL}")
             if input(f"{Fore.GREEN}Continue with full scan? (y/n): {Style.RESET_ALL}").lower() == 'y':
-                results = run_full_system_scan()
+                resume = False
+                if any(has_resumable_scan(drive) for drive in get_scan_volumes()):
+                    resume = input(f"{Fore.GREEN}Resume the interrupted full scan? (y/n): {Style.RESET_ALL}").lower() == 'y'
+                results = run_full_system_scan(resume=resume)
                 print(f"\n{Fore.GREEN}[✓] Full system scan completed!{Style.RESET_ALL}")
 
                 # Gather infection summary across all drives
@@ -764,6 +2746,9 @@ def main():
 
 
 if __name__ == "__main__":
+    # Needed for the parallel volume scan's worker processes in the frozen exe
+    multiprocessing.freeze_support()
+
     # Show banner
     print(f"""{Fore.CYAN}
 ╔══════════════════════════════════════════════════════╗
@@ -3,6 +3,7 @@ import os
 import sys
 import json
 import threading
+import multiprocessing
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
 from datetime import datetime
@@ -642,7 +643,8 @@ class SecurityScannerGUI:
             # Get security status information
             defender_status = get_defender_status()
             firewall_status = check_firewall_status()
-            open_ports = scan_open_ports()
+            # Read the local socket table rather than connecting to every port
+            open_ports = scan_open_ports(method="socket_table")
             
             # Update system status text
             is_admin_status = is_admin()
@@ -790,14 +792,14 @@ class SecurityScannerGUI:
                 directory = self.directory_var.get()
                 self.log(f"Scanning directory: {directory}")
                 self.scan_results = run_directory_scan(
-                    directory
+                    directory, event_callback=self.handle_scan_event
                 )
                 print(self.scan_results)
 
                 
             elif scan_type == "full":
                 self.log("Performing full system scan. This may take a while...")
-                self.scan_results = run_full_system_scan()
+                self.scan_results = run_full_system_scan(event_callback=self.handle_scan_event)
 
                 
             # Update UI with results
@@ -822,6 +824,18 @@ class SecurityScannerGUI:
             # Re-enable UI elements
             self.root.after(0, self.scan_completed)
             
+    def handle_scan_event(self, event):
+        """Show findings and progress from a running file scan as they arrive (called from scan thread)"""
+        if event["event"] == "finding":
+            finding = event["finding"]
+            self.log(f"Infected file found: {finding['file']} ({finding['malware']})")
+        elif event["event"] == "progress":
+            location = f" on {event['drive']}" if "drive" in event else ""
+            self.update_scan_progress(
+                event["progress"],
+                f"Scanned {event['scanned']} of ~{event['total']} files{location}"
+            )
+
     def update_scan_progress(self, progress, status_message):
         """Update scan progress from scan thread"""
         self.root.after(0, lambda: self.progress_var.set(progress))
@@ -995,6 +1009,8 @@ class SecurityScannerGUI:
 
 # Main execution
 if __name__ == "__main__":
+    # Needed for the parallel volume scan's worker processes in the frozen exe
+    multiprocessing.freeze_support()
     if not is_admin():
         ctypes.windll.shell32.ShellExecuteW(None, "runas", sys.executable, " ".join(sys.argv), None, 1)
         sys.exit()
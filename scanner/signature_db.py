@@ -0,0 +1,299 @@
+import os
+import math
+import mmap
+import struct
+import tempfile
+
+# On-disk layout (all integers little-endian):
+#   header    magic, format, section count, signature set version, name table and size table locations
+#   sections  one per digest algorithm: records sorted by digest, a bucket index and an optional Bloom filter
+#   records   digest | name index (u32) | sample size (u64, SIZE_UNKNOWN when not known)
+#   buckets   2**bucket_bits + 1 record indexes; bucket b spans the records whose leading digest bits equal b
+#   sizes     sorted distinct sample sizes (u64), so size exclusion works without loading anything
+#   names     (name_count + 1) u32 offsets into a UTF-8 blob that follows them
+SIGNATURE_DB_MAGIC = b"SCANSIG\0"
+SIGNATURE_DB_FORMAT = 1
+SIZE_UNKNOWN = 2 ** 64 - 1
+
+DIGEST_SIZES = {"md5": 16, "sha1": 20, "sha256": 32}
+
+_HEADER = struct.Struct("<8sIIQQIIQII")
+_SECTION = struct.Struct("<8sIIIIQQQQ")
+_RECORD_TAIL = struct.Struct("<IQ")
+_U32 = struct.Struct("<I")
+_U64 = struct.Struct("<Q")
+_BUCKET = struct.Struct("<II")
+
+# Header flag: some signature has no known size, so no file can be ruled out by size
+_FLAG_HAS_UNSIZED = 1
+
+# Leading digest bits used for the bucket index; about four records per bucket, capped at 4 MB of index
+_MAX_BUCKET_BITS = 20
+
+
+def _bloom_positions(digest, bloom_bits, bloom_hashes):
+    # Digests are already uniformly distributed, so two slices of the digest drive double hashing
+    h1 = int.from_bytes(digest[:8], "little")
+    h2 = int.from_bytes(digest[8:16], "little") | 1
+    return [(h1 + i * h2) % bloom_bits for i in range(bloom_hashes)]
+
+
+# Function: Write a binary signature database from signature records
+def build_signature_db(records, path, version=0, bloom_bits_per_entry=0):
+    """Write records ({"md5"/"sha1"/"sha256", "name", "size"} dicts) to path atomically.
+
+    bloom_bits_per_entry > 0 adds a Bloom filter in front of each section
+    (10 bits per entry gives about a 1% false positive rate).
+    """
+    names = {}
+    entries = {algorithm: [] for algorithm in DIGEST_SIZES}
+    sizes = set()
+    has_unsized = False
+    for record in records:
+        name_index = names.setdefault(record["name"], len(names))
+        size = record.get("size")
+        if size is None:
+            has_unsized = True
+            size = SIZE_UNKNOWN
+        else:
+            sizes.add(size)
+        for algorithm in DIGEST_SIZES:
+            if record.get(algorithm):
+                entries[algorithm].append((bytes.fromhex(record[algorithm]), name_index, size))
+
+    sections = []
+    for algorithm, items in entries.items():
+        if not items:
+            continue
+        items.sort()
+        # Keep the first record for a digest listed twice
+        unique = [item for i, item in enumerate(items) if i == 0 or item[0] != items[i - 1][0]]
+        count = len(unique)
+        bucket_bits = min((count // 4).bit_length(), _MAX_BUCKET_BITS)
+        buckets = [0] * ((1 << bucket_bits) + 1)
+        for digest, _, _ in unique:
+            buckets[(int.from_bytes(digest[:3], "big") >> (24 - bucket_bits)) + 1] += 1
+        for i in range(1, len(buckets)):
+            buckets[i] += buckets[i - 1]
+
+        bloom = b""
+        bloom_hashes = 0
+        if bloom_bits_per_entry:
+            bloom_bits = max(64, -(-count * bloom_bits_per_entry // 8) * 8)
+            bloom_hashes = max(1, min(16, round(bloom_bits_per_entry * math.log(2))))
+            bits = bytearray(bloom_bits // 8)
+            for digest, _, _ in unique:
+                for position in _bloom_positions(digest, bloom_bits, bloom_hashes):
+                    bits[position >> 3] |= 1 << (position & 7)
+            bloom = bytes(bits)
+
+        sections.append({
+            "algorithm": algorithm,
+            "count": count,
+            "bucket_bits": bucket_bits,
+            "bloom_hashes": bloom_hashes,
+            "records": b"".join(digest + _RECORD_TAIL.pack(name_index, size) for digest, name_index, size in unique),
+            "buckets": b"".join(_U32.pack(start) for start in buckets),
+            "bloom": bloom
+        })
+
+    name_list = sorted(names, key=names.get)
+    encoded = [name.encode("utf-8") for name in name_list]
+    name_offsets = [0]
+    for name in encoded:
+        name_offsets.append(name_offsets[-1] + len(name))
+    names_blob = b"".join(_U32.pack(offset) for offset in name_offsets) + b"".join(encoded)
+    sizes_blob = b"".join(_U64.pack(size) for size in sorted(sizes))
+
+    # Lay the blocks out after the header and section table
+    offset = _HEADER.size + _SECTION.size * len(sections)
+    section_table = []
+    blocks = []
+    for section in sections:
+        locations = []
+        for key in ("records", "buckets", "bloom"):
+            locations.append(offset)
+            blocks.append(section[key])
+            offset += len(section[key])
+        section_table.append(_SECTION.pack(
+            section["algorithm"].encode("ascii"), DIGEST_SIZES[section["algorithm"]], section["count"],
+            section["bucket_bits"], section["bloom_hashes"], locations[0], locations[1], locations[2],
+            len(section["bloom"]) * 8))
+    sizes_offset = offset
+    names_offset = sizes_offset + len(sizes_blob)
+    header = _HEADER.pack(SIGNATURE_DB_MAGIC, SIGNATURE_DB_FORMAT, len(sections), version, names_offset,
+                          len(name_list), _FLAG_HAS_UNSIZED if has_unsized else 0, sizes_offset, len(sizes), 0)
+
+    db_dir = os.path.dirname(path)
+    if db_dir:
+        os.makedirs(db_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=db_dir or None, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(header)
+            f.write(b"".join(section_table))
+            for block in blocks:
+                f.write(block)
+            f.write(sizes_blob)
+            f.write(names_blob)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return path
+
+
+class SignatureDB:
+    """Read-only view of a binary signature database through mmap.
+
+    Opening only parses the header and section table, so load time does not grow with
+    the number of signatures. Lookups read the mapping in place and build a record dict
+    only for a hit.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            self._file.close()
+            raise
+        try:
+            self._parse()
+        except (ValueError, struct.error):
+            self.close()
+            raise
+        # Identifies this build of the database, e.g. for caching results that depend on it
+        st = os.fstat(self._file.fileno())
+        self.fingerprint = f"{self.version}:{st.st_size}:{st.st_mtime_ns}"
+
+    def _parse(self):
+        mm = self._mm
+        (magic, file_format, section_count, self.version, self._names_offset, self._name_count, flags,
+         self._sizes_offset, self._sizes_count, _) = _HEADER.unpack_from(mm, 0)
+        if magic != SIGNATURE_DB_MAGIC or file_format != SIGNATURE_DB_FORMAT:
+            raise ValueError(f"{self.path} is not a signature database")
+        self.has_unsized = bool(flags & _FLAG_HAS_UNSIZED)
+        self.sections = {}
+        for i in range(section_count):
+            (algorithm, digest_size, count, bucket_bits, bloom_hashes, records_offset, buckets_offset,
+             bloom_offset, bloom_bits) = _SECTION.unpack_from(mm, _HEADER.size + i * _SECTION.size)
+            algorithm = algorithm.rstrip(b"\0").decode("ascii")
+            self.sections[algorithm] = (digest_size, digest_size + _RECORD_TAIL.size, count, 24 - bucket_bits,
+                                        records_offset, buckets_offset, bloom_offset, bloom_bits, bloom_hashes)
+        self.algorithms = tuple(self.sections)
+
+    def __len__(self):
+        return sum(section[2] for section in self.sections.values())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+    def __getstate__(self):
+        # Volume worker processes map the file themselves
+        return {"path": self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"])
+
+    def _name(self, name_index):
+        start, end = struct.unpack_from("<II", self._mm, self._names_offset + 4 * name_index)
+        blob = self._names_offset + 4 * (self._name_count + 1)
+        return self._mm[blob + start:blob + end].decode("utf-8")
+
+    def lookup(self, algorithm, digest):
+        """Return the record for a digest (hex string or bytes), or None"""
+        section = self.sections.get(algorithm)
+        if section is None or not digest:
+            return None
+        if isinstance(digest, str):
+            try:
+                digest = bytes.fromhex(digest)
+            except ValueError:
+                return None
+        (digest_size, record_size, count, bucket_shift, records_offset, buckets_offset, bloom_offset,
+         bloom_bits, bloom_hashes) = section
+        if len(digest) != digest_size:
+            return None
+        mm = self._mm
+
+        if bloom_bits:
+            h1 = int.from_bytes(digest[:8], "little")
+            h2 = int.from_bytes(digest[8:16], "little") | 1
+            for i in range(bloom_hashes):
+                position = (h1 + i * h2) % bloom_bits
+                if not mm[bloom_offset + (position >> 3)] & (1 << (position & 7)):
+                    return None
+
+        # The bucket narrows the search to a handful of records, then binary search within it
+        low, high = _BUCKET.unpack_from(mm, buckets_offset + 4 * (int.from_bytes(digest[:3], "big") >> bucket_shift))
+        while low < high:
+            middle = (low + high) // 2
+            offset = records_offset + middle * record_size
+            candidate = mm[offset:offset + digest_size]
+            if candidate < digest:
+                low = middle + 1
+            elif candidate > digest:
+                high = middle
+            else:
+                name_index, size = _RECORD_TAIL.unpack_from(mm, offset + digest_size)
+                return {
+                    algorithm: digest.hex(),
+                    "name": self._name(name_index),
+                    "size": None if size == SIZE_UNKNOWN else size
+                }
+        return None
+
+    def size_may_match(self, size):
+        if self.has_unsized:
+            return True
+        low, high = 0, self._sizes_count
+        while low < high:
+            middle = (low + high) // 2
+            candidate = _U64.unpack_from(self._mm, self._sizes_offset + 8 * middle)[0]
+            if candidate < size:
+                low = middle + 1
+            elif candidate > size:
+                high = middle
+            else:
+                return True
+        return False
+
+
+# Function: Convert a JSON signature feed into a binary database
+def main():
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Build a binary signature database from a JSON feed")
+    parser.add_argument("source", help='JSON list of signature records, or {"version": N, "signatures": [...]}')
+    parser.add_argument("output")
+    parser.add_argument("--version", type=int, default=None, help="signature set version (default: from the feed)")
+    parser.add_argument("--bloom-bits", type=int, default=0, help="Bloom filter bits per entry, 0 for none")
+    args = parser.parse_args()
+
+    with open(args.source, "r", encoding="utf-8") as f:
+        feed = json.load(f)
+    if isinstance(feed, dict):
+        records, version = feed.get("signatures", []), feed.get("version", 0)
+    else:
+        records, version = feed, 0
+    if args.version is not None:
+        version = args.version
+    build_signature_db(records, args.output, version=version, bloom_bits_per_entry=args.bloom_bits)
+    with SignatureDB(args.output) as db:
+        print(f"Wrote {len(db)} digests (version {db.version}) to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
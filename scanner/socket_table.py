@@ -0,0 +1,220 @@
+import codecs
+import csv
+import locale
+import os
+import socket
+import subprocess
+import sys
+
+from port_scanner import port_service
+
+# /proc/net tables and the connection state that means a socket is waiting for peers:
+# TCP_LISTEN for TCP, and TCP_CLOSE (unconnected) for UDP
+PROC_NET_TABLES = (("tcp", "0A"), ("tcp6", "0A"), ("udp", "07"), ("udp6", "07"))
+
+
+def _parse_proc_address(text):
+    address, port = text.split(":")
+    raw = bytes.fromhex(address)
+    # The kernel prints the address as 32-bit words in host byte order
+    if sys.byteorder == "little":
+        raw = b"".join(raw[i:i + 4][::-1] for i in range(0, len(raw), 4))
+    family = socket.AF_INET if len(raw) == 4 else socket.AF_INET6
+    return socket.inet_ntop(family, raw), int(port, 16)
+
+
+class ProcNetBackend:
+    """Linux: read the kernel socket tables under /proc/net and find owners through /proc/<pid>/fd.
+
+    proc_root points at another tree laid out like /proc, e.g. fixture files captured from a
+    machine. Sockets of processes this user may not inspect are listed without an owner.
+    """
+
+    def __init__(self, proc_root="/proc"):
+        self.proc_root = proc_root
+
+    def listening_sockets(self):
+        sockets = []
+        tables_read = 0
+        for protocol, listen_state in PROC_NET_TABLES:
+            try:
+                with open(os.path.join(self.proc_root, "net", protocol), "r") as f:
+                    lines = f.read().splitlines()[1:]
+            except OSError:
+                # No IPv6 support, or the table is missing from a fixture tree
+                continue
+            tables_read += 1
+            for line in lines:
+                fields = line.split()
+                if len(fields) < 10 or fields[3] != listen_state:
+                    continue
+                address, port = _parse_proc_address(fields[1])
+                if protocol.startswith("udp") and _parse_proc_address(fields[2])[1]:
+                    # A connected UDP socket only talks to its one peer
+                    continue
+                sockets.append({"protocol": protocol, "address": address, "port": port,
+                                "inode": int(fields[9])})
+        if not tables_read:
+            raise OSError(f"No socket tables under {os.path.join(self.proc_root, 'net')}")
+
+        owners = self._socket_owners({entry["inode"] for entry in sockets if entry["inode"]})
+        processes = {}
+        for entry in sockets:
+            pid = owners.get(entry.pop("inode"))
+            if pid is not None and pid not in processes:
+                processes[pid] = self._process(pid)
+            entry.update(pid=pid, **(processes[pid] if pid is not None else {"process": None, "exe": None}))
+        return sockets
+
+    def _socket_owners(self, inodes):
+        """Map socket inodes to the first process holding a descriptor for them"""
+        owners = {}
+        if not inodes:
+            return owners
+        for pid in os.listdir(self.proc_root):
+            if not pid.isdigit():
+                continue
+            fd_dir = os.path.join(self.proc_root, pid, "fd")
+            try:
+                fds = os.listdir(fd_dir)
+            except OSError:
+                continue
+            for fd in fds:
+                try:
+                    target = os.readlink(os.path.join(fd_dir, fd))
+                except OSError:
+                    continue
+                if target.startswith("socket:["):
+                    inode = int(target[8:-1])
+                    if inode in inodes:
+                        owners.setdefault(inode, int(pid))
+            if len(owners) == len(inodes):
+                break
+        return owners
+
+    def _process(self, pid):
+        process = {"process": None, "exe": None}
+        try:
+            with open(os.path.join(self.proc_root, str(pid), "comm"), "r") as f:
+                process["process"] = f.read().strip()
+        except OSError:
+            pass
+        try:
+            process["exe"] = os.readlink(os.path.join(self.proc_root, str(pid), "exe"))
+        except OSError:
+            pass
+        return process
+
+
+class NetstatBackend:
+    """Windows: parse `netstat -ano`, naming the owning processes from `tasklist`"""
+
+    def listening_sockets(self):
+        netstat = subprocess.run(["netstat", "-ano"], capture_output=True, check=True).stdout
+        tasklist = subprocess.run(["tasklist", "/FO", "CSV", "/NH"], capture_output=True).stdout
+        return self.parse(self.decode(netstat), self.decode(tasklist))
+
+    @staticmethod
+    def decode(output):
+        """Text of netstat/tasklist output bytes.
+
+        Console programs write in the OEM code page, not the ANSI one text=True decodes with,
+        so e.g. a French "ÉCOUTE" would not decode. Undecodable bytes are replaced; the parser
+        only relies on the ASCII columns.
+        """
+        try:
+            encoding = codecs.lookup("oem").name
+        except LookupError:
+            # Only Windows has the "oem" codec
+            encoding = locale.getpreferredencoding(False)
+        return output.decode(encoding, errors="replace")
+
+    @staticmethod
+    def parse(netstat_output, tasklist_output=""):
+        """Listening sockets from netstat -ano text, e.g. saved from another machine"""
+        names = {}
+        for row in csv.reader(tasklist_output.splitlines()):
+            if len(row) >= 2 and row[1].isdigit():
+                names[int(row[1])] = row[0]
+
+        sockets = []
+        for line in netstat_output.splitlines():
+            fields = line.split()
+            if len(fields) == 5 and fields[0] == "TCP":
+                # The state column is localized, but only listening sockets have no remote port
+                local, remote, pid = fields[1], fields[2], fields[4]
+                if not remote.endswith(":0"):
+                    continue
+            elif len(fields) == 4 and fields[0] == "UDP":
+                local, pid = fields[1], fields[3]
+            else:
+                continue
+            address, _, port = local.rpartition(":")
+            if not port.isdigit() or not pid.isdigit():
+                continue
+            ipv6 = address.startswith("[")
+            pid = int(pid)
+            sockets.append({
+                "protocol": fields[0].lower() + ("6" if ipv6 else ""),
+                "address": address.strip("[]").split("%")[0],
+                "port": int(port),
+                "pid": pid,
+                "process": names.get(pid),
+                "exe": None
+            })
+        return sockets
+
+
+# Socket table backends by sys.platform; add an entry to support another OS
+SOCKET_TABLE_BACKENDS = {
+    "linux": ProcNetBackend,
+    "win32": NetstatBackend
+}
+
+
+# Function: Pick the socket table backend for this OS (or a /proc-style tree when proc_root is given)
+def get_socket_table_backend(proc_root=None):
+    if proc_root is not None:
+        return ProcNetBackend(proc_root)
+    backend = SOCKET_TABLE_BACKENDS.get(sys.platform)
+    if backend is None:
+        raise OSError(f"No socket table backend for {sys.platform}")
+    return backend()
+
+
+# Function: List the sockets listening on this machine with their owning processes
+def list_listening_sockets(backend=None, proc_root=None):
+    """Return [{"port", "service", "protocol", "address", "pid", "process", "exe"}] sorted by port.
+
+    pid, process and exe are None when the owner can't be determined, e.g. without admin rights.
+    """
+    backend = backend or get_socket_table_backend(proc_root)
+    sockets = [dict(entry, service=port_service(entry["port"])) for entry in backend.listening_sockets()]
+    sockets.sort(key=lambda entry: (entry["port"], entry["protocol"], entry["address"]))
+    return [{key: entry[key] for key in ("port", "service", "protocol", "address", "pid", "process", "exe")}
+            for entry in sockets]
+
+
+# Function: Collapse listening sockets to one entry per protocol and port
+def group_open_ports(sockets, protocols=("tcp", "udp")):
+    """Merge the sockets of each (protocol, port) - IPv4 and IPv6, or several bound addresses -
+    into one entry with an "addresses" list; tcp6/udp6 count as tcp/udp.
+
+    The owner is taken from the first socket whose process is known.
+    """
+    grouped = {}
+    for entry in sockets:
+        protocol = entry["protocol"].rstrip("6")
+        if protocol not in protocols:
+            continue
+        group = grouped.get((protocol, entry["port"]))
+        if group is None:
+            group = grouped[(protocol, entry["port"])] = {
+                "port": entry["port"], "service": entry["service"], "protocol": protocol, "addresses": [],
+                "pid": None, "process": None, "exe": None
+            }
+        if entry["address"] not in group["addresses"]:
+            group["addresses"].append(entry["address"])
+        if group["pid"] is None and entry["pid"] is not None:
+            group.update(pid=entry["pid"], process=entry["process"], exe=entry["exe"])
+    return sorted(grouped.values(), key=lambda group: (group["port"], group["protocol"]))
@@ -0,0 +1,46 @@
+"""ScanRules path globs, matched relative to the scan root at a path component"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scanner import ScanRules, walk_files  # noqa: E402
+
+
+def make_tree(root, paths):
+    for path in paths:
+        full = os.path.join(root, *path.split("/"))
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        with open(full, "wb") as f:
+            f.write(b"x")
+
+
+def allowed_files(root, rules):
+    root = str(root)
+    files = [entry for entry, _ in walk_files(root, prune_dir=lambda entry: rules.prunes_dir(entry, root))]
+    return sorted(os.path.relpath(entry.path, root).replace(os.sep, "/")
+                  for entry in files if rules.allows_file(entry, root))
+
+
+def test_path_glob_does_not_match_inside_a_component(tmp_path):
+    make_tree(tmp_path, ["src/a.js", "mysrc/b.js", "lib/src/c.js", "src/d.txt"])
+    rules = ScanRules({"exclude": {"globs": ["src/*.js"]}})
+    assert allowed_files(tmp_path, rules) == ["mysrc/b.js", "src/d.txt"]
+
+
+def test_leading_slash_anchors_glob_at_root(tmp_path):
+    make_tree(tmp_path, ["src/a.js", "lib/src/c.js"])
+    rules = ScanRules({"exclude": {"globs": ["/src/*.js"]}})
+    assert allowed_files(tmp_path, rules) == ["lib/src/c.js"]
+
+
+def test_exclude_dir_path_prunes_relative_to_root(tmp_path):
+    make_tree(tmp_path, ["a/src/x.py", "a/srcs/y.py", "b/src/z.py", "c/a/src/w.py"])
+    rules = ScanRules({"exclude_dirs": ["a/src"]})
+    assert allowed_files(tmp_path, rules) == ["a/srcs/y.py", "b/src/z.py"]
+
+
+def test_include_path_glob(tmp_path):
+    make_tree(tmp_path, ["src/a.js", "mysrc/b.js", "src/c.txt"])
+    rules = ScanRules({"include": {"globs": ["src/*.js"]}})
+    assert allowed_files(tmp_path, rules) == ["src/a.js"]
@@ -0,0 +1,90 @@
+"""Socket table backends parsed offline from fixture files"""
+import os
+import shutil
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from socket_table import NetstatBackend, ProcNetBackend, group_open_ports, list_listening_sockets  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        return f.read()
+
+
+def summary(sockets):
+    return [(s["port"], s["protocol"], s["address"], s["pid"], s["process"]) for s in sockets]
+
+
+@pytest.fixture
+def proc_root(tmp_path):
+    """The fixture /proc/net tables plus two processes owning some of their sockets"""
+    shutil.copytree(os.path.join(FIXTURES, "proc"), tmp_path, dirs_exist_ok=True)
+    for pid, name, inodes in ((100, "sshd", (111, 112)), (200, "nginx", (222, 223))):
+        fd_dir = tmp_path / str(pid) / "fd"
+        fd_dir.mkdir(parents=True)
+        (tmp_path / str(pid) / "comm").write_text(name + "\n")
+        os.symlink(f"/usr/sbin/{name}", tmp_path / str(pid) / "exe")
+        os.symlink("/dev/null", fd_dir / "0")
+        for fd, inode in enumerate(inodes, start=3):
+            os.symlink(f"socket:[{inode}]", fd_dir / str(fd))
+    return str(tmp_path)
+
+
+@pytest.mark.skipif(not hasattr(os, "symlink") or sys.byteorder != "little",
+                    reason="fixture tables are in little-endian byte order and owners need symlinks")
+def test_proc_net_listening_sockets_with_owners(proc_root):
+    sockets = list_listening_sockets(proc_root=proc_root)
+    assert summary(sockets) == [
+        (22, "tcp", "0.0.0.0", 100, "sshd"),
+        (22, "tcp6", "::", 100, "sshd"),
+        (53, "udp", "0.0.0.0", None, None),
+        (80, "tcp", "0.0.0.0", 200, "nginx"),
+        (8080, "tcp6", "::1", 200, "nginx"),
+    ]
+    assert sockets[0]["exe"] == "/usr/sbin/sshd"
+
+
+@pytest.mark.skipif(not hasattr(os, "symlink") or sys.byteorder != "little",
+                    reason="fixture tables are in little-endian byte order and owners need symlinks")
+def test_group_open_ports_merges_address_families(proc_root):
+    grouped = group_open_ports(list_listening_sockets(proc_root=proc_root), ("tcp",))
+    assert [(g["port"], g["protocol"], g["addresses"], g["process"]) for g in grouped] == [
+        (22, "tcp", ["0.0.0.0", "::"], "sshd"),
+        (80, "tcp", ["0.0.0.0"], "nginx"),
+        (8080, "tcp", ["::1"], "nginx"),
+    ]
+
+
+def test_proc_net_without_tables_raises(tmp_path):
+    with pytest.raises(OSError):
+        ProcNetBackend(str(tmp_path)).listening_sockets()
+
+
+def test_netstat_parse():
+    sockets = NetstatBackend.parse(NetstatBackend.decode(read_fixture("netstat_en.txt")),
+                                   NetstatBackend.decode(read_fixture("tasklist.csv")))
+    assert summary(sockets) == [
+        (135, "tcp", "0.0.0.0", 1040, "svchost.exe"),
+        (445, "tcp", "0.0.0.0", 4, "System"),
+        (5432, "tcp", "127.0.0.1", 3312, "postgres.exe"),
+        (135, "tcp6", "::", 1040, "svchost.exe"),
+        (139, "tcp6", "fe80::1", 4, "System"),
+        (5353, "udp", "0.0.0.0", 2216, None),
+        (1900, "udp6", "::1", 5120, None),
+    ]
+
+
+def test_netstat_parse_localized_oem_output():
+    # French netstat in code page 850 ("ÉCOUTE" starts with byte 0x90), which is not valid in most ANSI/UTF-8 locales
+    sockets = NetstatBackend.parse(NetstatBackend.decode(read_fixture("netstat_fr_cp850.txt")),
+                                   NetstatBackend.decode(read_fixture("tasklist_fr_cp850.csv")))
+    assert [(s["port"], s["protocol"], s["pid"]) for s in sockets] == [
+        (135, "tcp", 1040), (5432, "tcp", 3312), (135, "tcp6", 1040), (5353, "udp", 2216)
+    ]
+    assert sockets[0]["process"] == "svchost.exe"